@@ -1,72 +1,69 @@
+import argparse
+import sys
+import time
 import oracledb
-#oracledb
-oracledb.init_oracle_client(
-    lib_dir=r"C:\Users\QG165WL\Downloads\instantclient-basic-windows.x64-23.26.0.0.0\instantclient_23_0"
-)
+from typing import List, Optional
 
-conn = oracledb.connect(
-    user="TGT_STG",
-    password="TGT_STG",
-    dsn="127.0.0.1:1521/XE"
+from batching import TableStats
+from bulk_load import build_deferred, insert_hint, mark_failed, print_timings, set_logging
+from chunking import chunk_ranges, range_predicate, run_chunks
+from incremental import (
+    Watermarks,
+    changed_predicate,
+    high_watermark,
+    merge_sql,
+    parse_watermarks,
+    unchanged,
 )
+from metadata import Column, TableMeta, build_create_sql, load_schema
+from metrics import MetricsLog
+from parallel import TableResult
+from validate import validate_tables, write_report
 
-cur = conn.cursor()
+#oracledb
+ORACLE_CLIENT_PATH = r"C:\Users\QG165WL\Downloads\instantclient-basic-windows.x64-23.26.0.0.0\instantclient_23_0"
 
+TGT_DB = {
+    "user": "TGT_STG",
+    "password": "TGT_STG",
+    "dsn": "127.0.0.1:1521/XE"
+}
 
-cur.execute("SELECT sys_context('USERENV','SERVICE_NAME') FROM dual")
-print("Connected to service:", cur.fetchone()[0])
+SRC_SCHEMA = "SRC_DW"
 
+# Schema metadata cache, reused while the source DDL is unchanged
+SCHEMA_CACHE_DIR = ".schema_cache"
 
-cur.execute("""
-    SELECT table_name
-    FROM all_tables
-    WHERE owner = 'SRC_DW'
-      AND table_name NOT LIKE 'BIN$%'
-""")
+# Server-side INSERT ... SELECT statements per chunked table
+CHUNKS = 1
+PARALLEL_DEGREE = 4
 
-tables = [t[0] for t in cur.fetchall()]
-print(f"Found {len(tables)} tables in SRC_DW")
+# "direct" loads with INSERT /*+ APPEND */ and builds indexes afterwards
+LOAD_MODE = "conventional"
 
+# Incremental sync: change-tracking column used when a table has it
+# (TABLE=COLUMN pairs in WATERMARK_COLUMNS win), ORA_ROWSCN otherwise,
+# and the file keeping each table's watermark between runs
+WATERMARK_COLUMN = ""
+WATERMARK_COLUMNS = {}
+SYNC_STATE_PATH = "sync_state.db"
 
-for table in tables:
-    print(f"\nMigrating table: {table}")
+# Window re-read below the stored watermark of a configured column, so rows
+# stamped before a sync but committed after it aren't lost (seconds for
+# DATE/TIMESTAMP columns, values for numeric ones; ORA_ROWSCN needs none)
+WATERMARK_LAG = 300
 
+# Per-table stage timings, one JSON line per table plus a run summary
+METRICS_PATH = "migration_metrics.jsonl"
 
-    cur.execute("""
-        SELECT column_name, data_type, data_length,
-               data_precision, data_scale, nullable
-        FROM all_tab_columns
-        WHERE owner = 'SRC_DW'
-          AND table_name = :tbl
-        ORDER BY column_id
-    """, tbl=table)
+# Post-migration validation: hash buckets per table and report file
+VALIDATION_BUCKETS = 64
+VALIDATION_REPORT = "validation_report.json"
 
-    cols = cur.fetchall()
 
-    ddl_cols = []
-    for name, dtype, length, prec, scale, nullable in cols:
-        if dtype in ("VARCHAR2", "CHAR"):
-            col_type = f"{dtype}({length})"
-        elif dtype == "NUMBER":
-            col_type = (
-                f"NUMBER({prec},{scale})" if prec is not None else "NUMBER"
-            )
-        else:
-            col_type = dtype
-
-        ddl_cols.append(
-            f'"{name}" {col_type} {"NULL" if nullable == "Y" else "NOT NULL"}'
-        )
-
-    create_sql = f"""
-        CREATE TABLE {table} (
-            {", ".join(ddl_cols)}
-        )
-    """
-
-    
+def create_table(cur, conn, table: str, columns: List[Column]) -> None:
     try:
-        cur.execute(create_sql)
+        cur.execute(build_create_sql(table, columns))
         conn.commit()
         print(f"Table {table} created")
     except oracledb.DatabaseError as e:
@@ -75,19 +72,293 @@ for table in tables:
         else:
             raise
 
- 
-    insert_sql = f"""
-        INSERT INTO {table}
-        SELECT * FROM src_dw.{table}
+
+def insert_sql(table: str, where: str = "") -> str:
+    return f"""
+        INSERT {insert_hint(LOAD_MODE, array=False)}INTO {table}
+        SELECT * FROM {SRC_SCHEMA}.{table} {where}
     """
 
-    cur.execute(insert_sql)
-    conn.commit()
 
-    print(f"Data copied for table {table}")
+def copy_table(cur, conn, table: str, stats: Optional[TableStats] = None) -> int:
+    stats = stats or TableStats(table)
+    with stats.timed("insert") as insert:
+        cur.execute(insert_sql(table))
+        insert.rows = rows = cur.rowcount
+    with stats.timed("commit", rows=rows):
+        conn.commit()
+    stats.add_batch(rows, 0)
+    return rows
+
+
+def copy_table_chunked(
+    cur,
+    pool,
+    meta: TableMeta,
+    chunks: int,
+    degree: int,
+    stats: Optional[TableStats] = None
+) -> int:
+    """One INSERT ... SELECT per key range, each on its own pooled connection."""
+    table = meta.name
+    stats = stats or TableStats(table)
+    source = f"{SRC_SCHEMA}.{table}"
+    key = meta.primary_key[0] if len(meta.primary_key) == 1 else "ROWID"
+    with stats.timed("chunking"):
+        ranges = chunk_ranges(cur, source, key, chunks)
+    print(f"Copying {table} as {len(ranges)} chunks on {key}")
+
+    sql = insert_sql(table, range_predicate(key))
+
+    def task(index: int, lo, hi) -> int:
+        chunk_conn = pool.acquire()
+        try:
+            chunk_cur = chunk_conn.cursor()
+            with stats.timed("insert") as insert:
+                chunk_cur.execute(sql, {"lo": lo, "hi": hi})
+                insert.rows = rows = chunk_cur.rowcount
+            with stats.timed("commit", rows=rows):
+                chunk_conn.commit()
+            chunk_cur.close()
+            stats.add_batch(rows, 0)
+            return rows
+        finally:
+            pool.release(chunk_conn)
+
+    tracker = run_chunks(table, ranges, task, degree)
+    tracker.raise_if_incomplete()
+    return tracker.total_rows
+
+
+def sync_table(
+    cur,
+    conn,
+    meta: TableMeta,
+    watermarks: Watermarks,
+    stats: Optional[TableStats] = None
+) -> int:
+    """One server-side MERGE of the rows changed since the stored watermark."""
+    table = meta.name
+    stats = stats or TableStats(table)
+    source = f"{SRC_SCHEMA}.{table}"
+    column = watermarks.column(meta)
+    since = watermarks.get(table, column)
+    with stats.timed("watermark"):
+        upto = high_watermark(cur, source, column)
+    if unchanged(column, since, upto, watermarks.lag):
+        print(f"No changes in {table} since {column} {since!r}")
+        return 0
+
+    watermarks.begin(table, column, upto)
+    where, params = changed_predicate(column, since, upto, watermarks.lag)
+    using = f"SELECT * FROM {source} {where}"
+    with stats.timed("merge") as merge:
+        cur.execute(merge_sql(table, meta.columns, meta.primary_key, using), params)
+        merge.rows = rows = cur.rowcount
+    with stats.timed("commit", rows=rows):
+        conn.commit()
+    stats.add_batch(rows, 0)
+    watermarks.finish(table, rows)
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Copy SRC_DW tables into TGT_STG")
+    parser.add_argument(
+        "--chunks", type=int, default=CHUNKS,
+        help="split each table into this many PK/ROWID range inserts"
+    )
+    parser.add_argument(
+        "--parallel", type=int, default=PARALLEL_DEGREE,
+        help="number of chunk inserts / index builds running at once"
+    )
+    parser.add_argument(
+        "--load-mode", choices=("conventional", "direct"), default=LOAD_MODE,
+        help="direct: INSERT /*+ APPEND */, indexes/constraints built afterwards"
+    )
+    parser.add_argument(
+        "--nologging", action="store_true",
+        help="load targets NOLOGGING (direct mode only)"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="MERGE only the rows changed since the last recorded watermark"
+    )
+    parser.add_argument(
+        "--watermark", default="",
+        help="change-tracking column, and/or TABLE=COLUMN pairs (default: ORA_ROWSCN)"
+    )
+    parser.add_argument(
+        "--watermark-lag", type=float, default=WATERMARK_LAG,
+        help="re-read this far below a configured column's watermark "
+             "(seconds for dates, values for numbers)"
+    )
+    parser.add_argument(
+        "--track-changes", action="store_true",
+        help="record each table's watermark on a full load for later --incremental runs"
+    )
+    parser.add_argument(
+        "--sync-state", default=SYNC_STATE_PATH,
+        help="SQLite file keeping the watermarks between runs"
+    )
+    parser.add_argument(
+        "--metrics", default=METRICS_PATH,
+        help="append per-table stage timings here as JSON lines ('' to disable)"
+    )
+    parser.add_argument(
+        "--validate", action="store_true",
+        help="compare row counts and hash buckets of source and target after loading"
+    )
+    parser.add_argument(
+        "--buckets", type=int, default=VALIDATION_BUCKETS,
+        help="hash buckets per table for validation"
+    )
+    parser.add_argument(
+        "--report", default=VALIDATION_REPORT,
+        help="where the JSON validation report is written"
+    )
+    args = parser.parse_args(argv)
+
+    if args.load_mode == "direct" and args.chunks > 1:
+        # direct-path inserts lock the whole table, chunks would just queue
+        parser.error("--load-mode direct cannot be combined with --chunks")
+    if args.nologging and args.load_mode != "direct":
+        parser.error("--nologging needs --load-mode direct")
+    if args.incremental and (args.chunks > 1 or args.load_mode == "direct"):
+        parser.error("--incremental cannot be combined with --chunks or --load-mode direct")
+    if args.incremental and args.track_changes:
+        parser.error("--track-changes is for full loads; --incremental always records")
+    return args
+
+
+def main(argv=None) -> int:
+    global LOAD_MODE, WATERMARK_COLUMN
+
+    args = parse_args(argv)
+    LOAD_MODE = args.load_mode
+    if args.watermark:
+        WATERMARK_COLUMN, columns = parse_watermarks(args.watermark)
+        WATERMARK_COLUMNS.update(columns)
+
+    oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_PATH)
+
+    conn = oracledb.connect(**TGT_DB)
+    cur = conn.cursor()
+
+    pool = None
+    if args.chunks > 1 or LOAD_MODE == "direct" or args.validate:
+        pool = oracledb.create_pool(
+            min=1, max=max(args.parallel, 2), increment=1, **TGT_DB
+        )
+
+    cur.execute("SELECT sys_context('USERENV','SERVICE_NAME') FROM dual")
+    print("Connected to service:", cur.fetchone()[0])
+
+    metrics = MetricsLog(args.metrics or None)
+    with metrics.timed("metadata"):
+        schema = load_schema(cur, SRC_SCHEMA, SCHEMA_CACHE_DIR)
+    tables = schema.table_names()
+    print(f"Found {len(tables)} tables in {SRC_SCHEMA}")
+
+    watermarks = None
+    if args.incremental or args.track_changes:
+        watermarks = Watermarks(
+            args.sync_state, TGT_DB["user"], WATERMARK_COLUMN, WATERMARK_COLUMNS,
+            args.watermark_lag
+        )
+
+    results = []
+    for table in tables:
+        meta = schema.table(table)
+
+        if args.incremental:
+            print(f"\nSyncing table: {table}")
+            if not meta.primary_key:
+                print(f"Table {table} has no primary key to MERGE on, skipping")
+                results.append(TableResult(table, "skipped", error="no primary key"))
+                continue
+            stats = TableStats(table)
+            with stats.timed("create"):
+                create_table(cur, conn, table, meta.columns)
+            rows = sync_table(cur, conn, meta, watermarks, stats)
+            stats.stop()
+            metrics.table_done(stats)
+            results.append(TableResult(table, "ok", rows, stats.seconds))
+            print(f"Changes merged for table {table} ({rows} rows)")
+            continue
+
+        print(f"\nMigrating table: {table}")
+
+        stats = TableStats(table)
+        with stats.timed("create"):
+            create_table(cur, conn, table, meta.columns)
+        if args.nologging:
+            set_logging(conn, table, logging=False)
+        if watermarks:
+            column = watermarks.column(meta)
+            with stats.timed("watermark"):
+                upto = high_watermark(cur, f"{SRC_SCHEMA}.{table}", column)
+            watermarks.begin(table, column, upto)
+
+        start = time.perf_counter()
+        if args.chunks > 1:
+            rows = copy_table_chunked(
+                cur, pool, meta, args.chunks, args.parallel, stats
+            )
+        else:
+            rows = copy_table(cur, conn, table, stats)
+        results.append(TableResult(table, "ok", rows, time.perf_counter() - start))
+        stats.stop()
+        metrics.table_done(stats)
+        if watermarks:
+            watermarks.finish(table, rows)
+
+        if args.nologging:
+            set_logging(conn, table, logging=True)
+        print(f"Data copied for table {table} ({rows} rows)")
+
+    if LOAD_MODE == "direct":
+        build_seconds, ddl_failures = build_deferred(
+            pool, schema.deferred_ddl(), tables, args.parallel, args.nologging
+        )
+        print_timings(results, build_seconds)
+        for table, seconds in build_seconds.items():
+            metrics.record("ddl", seconds, table=table)
+        mark_failed(results, ddl_failures)
+
+    valid = True
+    if args.validate:
+        # source and target share the database here; every check holds two
+        # connections from the same pool
+        with metrics.timed("validate"):
+            checks = validate_tables(
+                tables, schema, pool, pool, max(1, args.parallel // 2),
+                args.buckets, source_prefix=f"{SRC_SCHEMA}."
+            )
+        write_report(args.report, checks, args.buckets)
+        valid = all(c.status == "match" for c in checks)
+    metrics.summary()
+    metrics.close()
+
+    if watermarks:
+        watermarks.close()
+    if pool is not None:
+        pool.close()
+    cur.close()
+    conn.close()
 
+    failed = [r for r in results if r.status == "failed"]
+    if failed:
+        print("\nMigration finished with failures:")
+        for r in failed:
+            print(f"  {r.table}: {r.error.splitlines()[0]}")
+        return 1
+    if not valid:
+        print("\nMigration completed, but validation found differences.")
+        return 1
+    print("\nMigration completed successfully.")
+    return 0
 
-cur.close()
-conn.close()
 
-print("\nMigration completed successfully.")
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,53 @@
+import argparse
+import sys
 import oracledb
-from typing import List, Tuple
+from functools import partial
+from typing import Callable, List, Optional
+
+from batching import (
+    TableStats,
+    batch_size,
+    bind_input_sizes,
+    configure_fetch,
+    observed_width,
+    row_width,
+)
+from bulk_load import (
+    build_deferred,
+    insert_hint,
+    mark_failed,
+    print_timings,
+    set_logging,
+)
+from chunking import chunk_ranges, rowid_ranges, run_chunks
+from incremental import (
+    Watermarks,
+    bind_row,
+    changed_predicate,
+    high_watermark,
+    merge_sql,
+    parse_watermarks,
+    unchanged,
+)
+from journal import WHOLE_TABLE, Journal
+from lob_copy import (
+    LOCATOR_TYPES,
+    LobWriter,
+    inline_lob_handler,
+    lob_positions,
+    lob_select_list,
+)
+from metadata import Column, SchemaModel, TableMeta, build_create_sql, load_schema
+from metrics import MetricsLog
+from parallel import (
+    SkipTable,
+    create_pools,
+    print_summary,
+    report,
+    run_parallel,
+    run_table,
+)
+from validate import validate_tables, write_report
 
 # ----------------------------
 # CONFIG
@@ -19,134 +67,854 @@ TGT_DB = {
     "dsn": "127.0.0.1:1521/XE"
 }
 
-BATCH_SIZE = 1000
+SRC_SCHEMA = "SRC_DW"
 
-# ----------------------------
-# INIT ORACLE CLIENT (THICK)
-# ----------------------------
+# Schema metadata cache, reused while the source DDL is unchanged
+SCHEMA_CACHE_DIR = ".schema_cache"
 
-oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_PATH)
+# Rows per fetchmany/executemany; 0 sizes batches from row width and the budget
+BATCH_SIZE = 0
 
-# ----------------------------
-# CONNECTIONS
-# ----------------------------
+# Memory allowed for one fetched batch of rows, per worker
+MEMORY_BUDGET_MB = 32
 
-src_conn = oracledb.connect(**SRC_DB)
-tgt_conn = oracledb.connect(**TGT_DB)
+# Rows inserted between target commits (and journal checkpoints)
+COMMIT_ROWS = 50000
 
-src_cur = src_conn.cursor()
-tgt_cur = tgt_conn.cursor()
+# LOBs up to this size are fetched inline and array-inserted; larger ones
+# are streamed between locators in pieces of LOB_PIECE_BYTES
+LOB_INLINE_BYTES = 16 * 1024
+LOB_PIECE_BYTES = 1024 * 1024
 
-print("✅ Connected to Source and Target databases")
+# Number of tables copied at once; 1 keeps the original single-connection run
+PARALLEL_DEGREE = 1
 
-# ----------------------------
-# STEP 1: GET TABLE LIST FROM SOURCE
-# ----------------------------
+# Key ranges per chunked table; 1 copies each table with a single SELECT
+CHUNKS = 1
 
-src_cur.execute("""
-    SELECT table_name
-    FROM user_tables
-    ORDER BY table_name
-""")
+# Ranges of one chunked table copied at once; 0 means min(chunks, 4),
+# independent of PARALLEL_DEGREE
+CHUNK_PARALLEL = 0
 
-tables = [r[0] for r in src_cur.fetchall()]
-print(f"📦 Found {len(tables)} tables in source")
+# "conventional" row inserts, or "direct": APPEND_VALUES inserts with
+# indexes and constraints built after the load
+LOAD_MODE = "conventional"
+NOLOGGING = False
 
-# ----------------------------
-# HELPER: MAP ORACLE TYPES
-# ----------------------------
+# Progress journal used by --resume
+JOURNAL_PATH = "migration_journal.db"
 
-def map_oracle_type(
-    dtype: str,
-    length,
-    precision,
-    scale
-) -> str:
-    if dtype in ("VARCHAR2", "CHAR"):
-        return f"{dtype}({length})"
-    elif dtype == "NUMBER":
-        if precision is not None:
-            return f"NUMBER({precision},{scale})"
-        return "NUMBER"
-    elif dtype == "DATE":
-        return "DATE"
-    elif dtype.startswith("TIMESTAMP"):
-        return dtype
-    else:
-        return dtype  # fallback
+# Incremental sync: change-tracking column used when a table has it
+# (TABLE=COLUMN pairs in WATERMARK_COLUMNS win), ORA_ROWSCN otherwise,
+# and the file keeping each table's watermark between runs
+WATERMARK_COLUMN = ""
+WATERMARK_COLUMNS = {}
+SYNC_STATE_PATH = "sync_state.db"
+
+# Window re-read below the stored watermark of a configured column, so rows
+# stamped before a sync but committed after it aren't lost (seconds for
+# DATE/TIMESTAMP columns, values for numeric ones; ORA_ROWSCN needs none)
+WATERMARK_LAG = 300
+
+# Per-table stage timings, one JSON line per table plus a run summary
+METRICS_PATH = "migration_metrics.jsonl"
+
+# Post-migration validation: hash buckets per table and report file
+VALIDATION_BUCKETS = 64
+VALIDATION_REPORT = "validation_report.json"
 
 # ----------------------------
-# STEP 2–4: CREATE + LOAD TABLES
+# STEP 2–4: CREATE + LOAD ONE TABLE
 # ----------------------------
 
-for table in tables:
-    print(f"\n🚀 Migrating table: {table}")
+def db_errors(conn) -> tuple:
+    """Database errors of a connection: oracledb's, plus a stand-in's DB-API Error base."""
+    return (oracledb.DatabaseError, getattr(conn, "Error", oracledb.DatabaseError))
 
-    # ---- Read column metadata
-    src_cur.execute("""
-        SELECT column_name,
-               data_type,
-               data_length,
-               data_precision,
-               data_scale,
-               nullable
-        FROM user_tab_columns
-        WHERE table_name = :tbl
-        ORDER BY column_id
-    """, tbl=table)
-
-    columns = src_cur.fetchall()
-
-    # ---- Build CREATE TABLE
-    ddl_cols = []
-    for col in columns:
-        name, dtype, length, prec, scale, nullable = col
-        col_type = map_oracle_type(dtype, length, prec, scale)
-        null_flag = "NULL" if nullable == "Y" else "NOT NULL"
-        ddl_cols.append(f"{name} {col_type} {null_flag}")
-
-    create_sql = f"""
-        CREATE TABLE {table} (
-            {", ".join(ddl_cols)}
-        )
-    """
 
-    # ---- Execute CREATE on TARGET
+def create_target(tgt_conn, table: str, columns: List[Column], exists_ok: bool = False) -> None:
+    tgt_cur = tgt_conn.cursor()
     try:
-        tgt_cur.execute(create_sql)
+        tgt_cur.execute(build_create_sql(table, columns))
         tgt_conn.commit()
         print(f"🧱 Table created: {table}")
-    except oracledb.DatabaseError as e:
-        print(f"⚠️ Skipping table creation ({table}): {e}")
-        continue
+    except db_errors(tgt_conn) as e:
+        if exists_ok and ("ORA-00955" in str(e) or "already exists" in str(e)):
+            return
+        raise SkipTable(f"table creation failed: {e}")
+    finally:
+        tgt_cur.close()
 
-    # ---- Extract data from SOURCE
-    src_cur.execute(f"SELECT * FROM {table}")
 
-    col_count = len(columns)
-    placeholders = ",".join([f":{i+1}" for i in range(col_count)])
-    insert_sql = f"INSERT INTO {table} VALUES ({placeholders})"
+def clear_target(tgt_conn, table: str, where: str = "", params: Optional[dict] = None) -> None:
+    tgt_cur = tgt_conn.cursor()
+    try:
+        if where:
+            tgt_cur.execute(f"DELETE FROM {table} {where}", params or {})
+        else:
+            try:
+                tgt_cur.execute(f"TRUNCATE TABLE {table}")
+            except Exception:
+                # stand-in databases without TRUNCATE
+                tgt_cur.execute(f"DELETE FROM {table}")
+        tgt_conn.commit()
+    finally:
+        tgt_cur.close()
+
+
+def resume_key(meta: TableMeta) -> Optional[str]:
+    """Single-column primary key usable as a checkpoint key, if the table has one."""
+    if len(meta.primary_key) != 1:
+        return None
+    pk = meta.primary_key[0]
+    types = {col.name: col.data_type for col in meta.columns}
+    return pk if types.get(pk) in ("NUMBER", "VARCHAR2", "CHAR") else None
+
+
+def copy_rows(
+    src_conn,
+    tgt_conn,
+    table: str,
+    columns: List[Column],
+    where: str = "",
+    params: Optional[dict] = None,
+    order_by: Optional[str] = None,
+    on_batch: Optional[Callable] = None,
+    on_commit: Optional[Callable] = None,
+    stats: Optional[TableStats] = None,
+    merge_key: Optional[List[str]] = None
+) -> int:
+    """Copy the selected rows; with `merge_key` they are MERGEd on that key instead of inserted."""
+    stats = stats or TableStats(table)
+    src_cur = src_conn.cursor()
+    tgt_cur = tgt_conn.cursor()
+    try:
+        # LOB columns are streamed unless the source is a plain DB-API stand-in
+        lob_writer = None
+        if lob_positions(columns) and isinstance(src_cur, oracledb.Cursor):
+            lob_writer = LobWriter(tgt_conn, table, columns, LOB_PIECE_BYTES)
+
+        budget = MEMORY_BUDGET_MB * 1024 * 1024
+        width = row_width(columns, LOB_INLINE_BYTES)
+        batch = BATCH_SIZE or batch_size(width, budget)
+
+        # ---- Extract data from SOURCE
+        if lob_writer:
+            select_sql = f"SELECT {lob_select_list(columns)} FROM {table} {where}"
+            params = dict(params or {}, lob_limit=LOB_INLINE_BYTES)
+            src_cur.outputtypehandler = inline_lob_handler
+        else:
+            select_sql = f"SELECT * FROM {table} {where}"
+        if order_by:
+            select_sql += f" ORDER BY {order_by}"
+        configure_fetch(src_cur, batch)
+        with stats.timed("select"):
+            src_cur.execute(select_sql, params or {})
+
+        if merge_key:
+            insert_sql = merge_sql(table, columns, merge_key, bind_row(columns))
+            # a LONG bind can't feed a MERGE source; inline LOB values go in
+            # as temporary LOBs
+            bind_input_sizes(tgt_cur, columns, LOCATOR_TYPES)
+        else:
+            placeholders = ",".join([f":{i+1}" for i in range(len(columns))])
+            hint = insert_hint(LOAD_MODE, array=True)
+            insert_sql = f"INSERT {hint}INTO {table} VALUES ({placeholders})"
+            bind_input_sizes(tgt_cur, columns)
+
+        write_stage = "merge" if merge_key else "insert"
+        total_rows = 0
+        uncommitted = 0
+        measured = False
+
+        def commit() -> None:
+            with stats.timed("commit", rows=uncommitted):
+                tgt_conn.commit()
+            stats.add_commit()
+            # ---- Checkpoint only what the target has committed
+            if on_commit:
+                on_commit()
+
+        while True:
+            with stats.timed("fetch") as fetch:
+                rows = src_cur.fetchmany(batch)
+                fetch.rows, fetch.bytes = len(rows), len(rows) * width
+            if not rows:
+                break
+
+            small, large = rows, []
+            if lob_writer:
+                rows, small, large = lob_writer.split(rows)
+
+            if not measured:
+                # byte counts use the width the data really has; the batch
+                # stays at the arraysize the cursor was executed with
+                width = observed_width(rows)
+                measured = True
+
+            if small:
+                with stats.timed(write_stage, len(small), len(small) * width):
+                    tgt_cur.executemany(insert_sql, small)
+            if large:
+                if small and LOAD_MODE == "direct":
+                    # nothing may touch a table after a direct-path insert until commit
+                    with stats.timed("commit"):
+                        tgt_conn.commit()
+                with stats.timed("lob", rows=len(large)) as lob:
+                    if merge_key:
+                        moved = lob_writer.merge(large, merge_key)
+                    else:
+                        moved = lob_writer.write(large)
+                    lob.bytes = moved
+                stats.add_bytes(moved)
+            total_rows += len(rows)
+            uncommitted += len(rows)
+
+            stats.add_batch(len(rows), width)
+            if on_batch:
+                on_batch(rows)
+
+            # a direct-path insert must be committed before the next one
+            if uncommitted >= COMMIT_ROWS or LOAD_MODE == "direct":
+                commit()
+                uncommitted = 0
+
+        if uncommitted:
+            commit()
+
+        return total_rows
+    finally:
+        src_cur.close()
+        tgt_cur.close()
+
+
+def load_range(
+    src_conn,
+    tgt_conn,
+    table: str,
+    columns: List[Column],
+    key: Optional[str] = None,
+    lo=None,
+    hi=None,
+    journal: Optional[Journal] = None,
+    chunk: int = WHOLE_TABLE,
+    stats: Optional[TableStats] = None
+) -> int:
+    """Copy the rows of `table` with lo <= key <= hi, resuming from the journal if possible."""
+    state = journal.chunk(table, chunk) if journal else None
+    if state is not None and state["status"] == "done":
+        return state["rows"]
+
+    # Only a real key gives a restart point; ROWIDs differ on the target
+    resumable = journal is not None and key not in (None, "ROWID")
+
+    rows, last_key = 0, None
+    if state is not None and resumable:
+        rows, last_key = state["rows"], state["last_key"]
+
+    clauses, params = [], {}
+    if last_key is not None:
+        clauses.append(f"{key} > :lo")
+        params["lo"] = last_key
+    elif lo is not None:
+        clauses.append(f"{key} >= :lo")
+        params["lo"] = lo
+    if hi is not None:
+        clauses.append(f"{key} <= :hi")
+        params["hi"] = hi
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    if journal is None:
+        return copy_rows(
+            src_conn, tgt_conn, table, columns, where, params, stats=stats
+        )
 
-    total_rows = 0
+    if state is not None and state["status"] == "loading" and resumable:
+        # drop whatever was committed after the last checkpoint
+        clear_target(tgt_conn, table, where, params)
+        print(f"♻️ Resuming {table} chunk {chunk} after {last_key!r} ({rows} rows)")
+
+    journal.start_chunk(table, chunk)
+    key_index = [col.name for col in columns].index(key) if resumable else None
+
+    last = last_key
+
+    def on_batch(batch: list) -> None:
+        nonlocal rows, last
+        rows += len(batch)
+        if key_index is not None:
+            last = batch[-1][key_index]
+
+    def on_commit() -> None:
+        journal.checkpoint(table, chunk, last, rows)
+
+    copy_rows(
+        src_conn, tgt_conn, table, columns, where, params,
+        order_by=key if resumable else None,
+        on_batch=on_batch, on_commit=on_commit, stats=stats
+    )
+    journal.finish_chunk(table, chunk)
+    return rows
+
+
+def prepare_target(
+    tgt_conn,
+    table: str,
+    columns: List[Column],
+    key: Optional[str],
+    journal: Optional[Journal],
+    chunks: int = 1
+) -> bool:
+    """Create the target table, or get it ready to resume. Returns True when resuming."""
+    state = journal.table(table) if journal else None
+    if state is not None and state["status"] == "done":
+        raise SkipTable(f"already migrated ({state['rows']} rows, journal)")
+
+    if state is None or not state["ddl_done"]:
+        create_target(tgt_conn, table, columns)
+        if NOLOGGING:
+            set_logging(tgt_conn, table, logging=False)
+        if journal:
+            journal.mark_ddl(table, key, chunks)
+        return False
+
+    if state["chunks"] != chunks or state["chunk_key"] != key:
+        # checkpoints of another range layout say nothing about this one
+        print(
+            f"♻️ {table} was copied as {state['chunks']} range(s) on "
+            f"{state['chunk_key'] or 'no key'}, now {chunks} on {key or 'no key'}: "
+            f"reloading from scratch"
+        )
+        clear_target(tgt_conn, table)
+        journal.forget_chunks(table)
+        journal.mark_ddl(table, key, chunks)
+        return False
+
+    if key in (None, "ROWID"):
+        # no restart point without a key: reload the table from scratch
+        print(f"♻️ {table} has no usable key, reloading from scratch")
+        clear_target(tgt_conn, table)
+        journal.reset_progress(table)
+    return True
+
+
+def start_watermark(src_conn, meta: TableMeta, watermarks: Watermarks, resume: bool = False) -> None:
+    """Record a table's high watermark before a full load reads it."""
+    column = watermarks.column(meta)
+    src_cur = src_conn.cursor()
+    try:
+        upto = high_watermark(src_cur, meta.name, column)
+    finally:
+        src_cur.close()
+    watermarks.begin(meta.name, column, upto, resume)
+
+
+def table_aborted(stats: TableStats, metrics: Optional[MetricsLog], error: Exception) -> None:
+    """Report the stages of a table that raised, so a failing table still shows up in the metrics."""
+    stats.stop()
+    if metrics:
+        metrics.table_done(stats, "skipped" if isinstance(error, SkipTable) else "failed")
+
+
+def migrate_table(
+    src_conn,
+    tgt_conn,
+    table: str,
+    schema: SchemaModel,
+    journal: Optional[Journal] = None,
+    watermarks: Optional[Watermarks] = None,
+    metrics: Optional[MetricsLog] = None
+) -> int:
+    print(f"\n🚀 Migrating table: {table}")
 
-    while True:
-        rows = src_cur.fetchmany(BATCH_SIZE)
-        if not rows:
-            break
+    meta = schema.table(table)
+    columns = meta.columns
+    key = resume_key(meta) if journal else None
 
-        tgt_cur.executemany(insert_sql, rows)
-        tgt_conn.commit()
-        total_rows += len(rows)
+    stats = TableStats(table)
+    try:
+        with stats.timed("create"):
+            resuming = prepare_target(tgt_conn, table, columns, key, journal)
+        if watermarks:
+            with stats.timed("watermark"):
+                start_watermark(src_conn, meta, watermarks, resuming)
+
+        rows = load_range(
+            src_conn, tgt_conn, table, columns, key, journal=journal, stats=stats
+        )
+    except Exception as e:
+        table_aborted(stats, metrics, e)
+        raise
+    stats.stop()
+    print(f"⚡ {table}: {stats}")
+    if metrics:
+        metrics.table_done(stats)
+
+    if NOLOGGING:
+        set_logging(tgt_conn, table, logging=True)
+    if journal:
+        journal.finish_table(table, rows)
+    if watermarks:
+        watermarks.finish(table, rows)
+    return rows
+
+
+def table_ranges(src_conn, table: str, key: str, chunks: int) -> list:
+    """ROWID ranges from the extents of an owned table, NTILE over the key otherwise."""
+    src_cur = src_conn.cursor()
+    try:
+        if key == "ROWID":
+            try:
+                ranges = rowid_ranges(src_cur, table, chunks)
+            except db_errors(src_conn):
+                # no user_extents / DBMS_ROWID, e.g. a DB-API stand-in
+                ranges = []
+            if ranges:
+                return ranges
+        return chunk_ranges(src_cur, table, key, chunks)
+    finally:
+        src_cur.close()
+
+
+def migrate_table_chunked(
+    src_conn,
+    tgt_conn,
+    table: str,
+    schema: SchemaModel,
+    src_pool,
+    tgt_pool,
+    chunks: int,
+    degree: int,
+    journal: Optional[Journal] = None,
+    watermarks: Optional[Watermarks] = None,
+    metrics: Optional[MetricsLog] = None
+) -> int:
+    """Copy one table as `chunks` key ranges, each on its own pooled connection pair."""
+    print(f"\n🚀 Migrating table in chunks: {table}")
+
+    meta = schema.table(table)
+    columns = meta.columns
+    key = resume_key(meta) or "ROWID"
+
+    stats = TableStats(table)
+    with stats.timed("create"):
+        resuming = prepare_target(tgt_conn, table, columns, key, journal, chunks)
+    if watermarks:
+        with stats.timed("watermark"):
+            start_watermark(src_conn, meta, watermarks, resuming)
+    ranges = journal.ranges(table) if resuming else []
+    if not ranges:
+        with stats.timed("chunking"):
+            ranges = table_ranges(src_conn, table, key, chunks)
+        if journal:
+            journal.save_ranges(table, ranges)
+    print(f"🧩 {table}: {len(ranges)} chunks on {key}")
+
+    def task(index: int, lo, hi) -> int:
+        chunk_src = src_pool.acquire()
+        try:
+            chunk_tgt = tgt_pool.acquire()
+            try:
+                return load_range(
+                    chunk_src, chunk_tgt, table, columns,
+                    key, lo, hi, journal, index, stats
+                )
+            finally:
+                tgt_pool.release(chunk_tgt)
+        finally:
+            src_pool.release(chunk_src)
+
+    tracker = run_chunks(table, ranges, task, degree)
+    stats.stop()
+    print(f"⚡ {table}: {stats}")
+    if metrics:
+        metrics.table_done(stats, "ok" if tracker.complete else "failed")
+    tracker.raise_if_incomplete()
+
+    if NOLOGGING:
+        set_logging(tgt_conn, table, logging=True)
+    if journal:
+        journal.finish_table(table, tracker.total_rows)
+    if watermarks:
+        watermarks.finish(table, tracker.total_rows)
+    return tracker.total_rows
+
+
+def sync_table(
+    src_conn,
+    tgt_conn,
+    table: str,
+    schema: SchemaModel,
+    watermarks: Watermarks,
+    metrics: Optional[MetricsLog] = None
+) -> int:
+    """MERGE the rows changed since the table's stored watermark into the target."""
+    print(f"\n🔄 Syncing table: {table}")
+
+    meta = schema.table(table)
+    if not meta.primary_key:
+        raise SkipTable("no primary key to MERGE on, needs a full load")
+
+    stats = TableStats(table)
+    try:
+        with stats.timed("create"):
+            create_target(tgt_conn, table, meta.columns, exists_ok=True)
+
+        column = watermarks.column(meta)
+        since = watermarks.get(table, column)
+        src_cur = src_conn.cursor()
+        with stats.timed("watermark"):
+            upto = high_watermark(src_cur, table, column)
+        src_cur.close()
+        if unchanged(column, since, upto, watermarks.lag):
+            print(f"💤 {table}: no changes since {column} {since!r}")
+            stats.stop()
+            if metrics:
+                metrics.table_done(stats)
+            return 0
+
+        watermarks.begin(table, column, upto)
+        where, params = changed_predicate(column, since, upto, watermarks.lag)
+        print(f"🔎 {table}: {column} after {since!r} up to {upto!r}")
+
+        rows = copy_rows(
+            src_conn, tgt_conn, table, meta.columns, where, params,
+            stats=stats, merge_key=meta.primary_key
+        )
+    except Exception as e:
+        table_aborted(stats, metrics, e)
+        raise
+    stats.stop()
+    print(f"⚡ {table}: {stats}")
+    if metrics:
+        metrics.table_done(stats)
 
-    print(f"📥 Loaded {total_rows} rows into {table}")
+    watermarks.finish(table, rows)
+    return rows
 
 # ----------------------------
-# CLEANUP
+# RUNNERS
 # ----------------------------
 
-src_cur.close()
-tgt_cur.close()
-src_conn.close()
-tgt_conn.close()
+def run_serial(src_conn, tgt_conn, tables: List[str], worker: Callable) -> list:
+    results = []
+    for table in tables:
+        result = run_table(worker, src_conn, tgt_conn, table)
+        report(result)
+        results.append(result)
+    return results
+
+
+def table_worker(
+    schema: SchemaModel,
+    journal: Optional[Journal],
+    watermarks: Optional[Watermarks],
+    incremental: bool,
+    metrics: Optional[MetricsLog] = None
+) -> Callable:
+    if incremental:
+        return partial(sync_table, schema=schema, watermarks=watermarks, metrics=metrics)
+    return partial(
+        migrate_table, schema=schema, journal=journal, watermarks=watermarks, metrics=metrics
+    )
+
+
+def source_schema() -> SchemaModel:
+    src_conn = oracledb.connect(**SRC_DB)
+    src_cur = src_conn.cursor()
+    schema = load_schema(src_cur, SRC_SCHEMA, SCHEMA_CACHE_DIR)
+    src_cur.close()
+    src_conn.close()
+    return schema
+
+
+def run_validation(schema: SchemaModel, tables: List[str], args) -> bool:
+    print(f"\n🔎 Validating {len(tables)} tables ({args.buckets} hash buckets)")
+    degree = max(args.parallel, 2)
+    src_pool, tgt_pool = create_pools(SRC_DB, TGT_DB, degree)
+    checks = validate_tables(tables, schema, src_pool, tgt_pool, degree, args.buckets)
+    src_pool.close()
+    tgt_pool.close()
+
+    write_report(args.report, checks, args.buckets)
+    return all(c.status == "match" for c in checks)
+
+
+def dry_run(schema: SchemaModel, args) -> None:
+    sizes = schema.sizes()
+    for table in sorted(schema.table_names(), key=lambda t: sizes.get(t, 0), reverse=True):
+        meta = schema.table(table)
+        print(
+            f"\n-- {table}: {len(meta.columns)} columns, ~{meta.num_rows} rows, "
+            f"key {resume_key(meta) or 'ROWID'}, {len(meta.ddl)} indexes/constraints"
+        )
+        print(build_create_sql(table, meta.columns).strip())
+        if args.load_mode == "direct":
+            for _, _, sql in meta.ddl:
+                print(f"{sql};")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Copy SRC_DW tables to TGT_DW")
+    parser.add_argument(
+        "--parallel", type=int, default=PARALLEL_DEGREE,
+        help="number of tables copied concurrently (uses connection pools)"
+    )
+    parser.add_argument(
+        "--chunks", type=int, default=CHUNKS,
+        help="split tables into this many PK/ROWID ranges copied in parallel"
+    )
+    parser.add_argument(
+        "--chunk-parallel", type=int, default=CHUNK_PARALLEL,
+        help="ranges of a chunked table copied at once (default: min(chunks, 4))"
+    )
+    parser.add_argument(
+        "--chunk-tables", default="",
+        help="comma-separated tables to chunk (default: all tables)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help="fixed rows per batch (default: sized from row width)"
+    )
+    parser.add_argument(
+        "--memory-mb", type=int, default=MEMORY_BUDGET_MB,
+        help="memory budget for one fetched batch, per worker"
+    )
+    parser.add_argument(
+        "--commit-rows", type=int, default=COMMIT_ROWS,
+        help="rows inserted between commits"
+    )
+    parser.add_argument(
+        "--lob-inline-kb", type=int, default=LOB_INLINE_BYTES // 1024,
+        help="LOBs up to this size are fetched inline, larger ones are streamed"
+    )
+    parser.add_argument(
+        "--load-mode", choices=("conventional", "direct"), default=LOAD_MODE,
+        help="direct: APPEND_VALUES inserts, indexes/constraints built afterwards"
+    )
+    parser.add_argument(
+        "--nologging", action="store_true", default=NOLOGGING,
+        help="load targets NOLOGGING (direct mode only)"
+    )
+    parser.add_argument(
+        "--journal", default=None,
+        help=f"record progress in this SQLite file (default with --resume: {JOURNAL_PATH})"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="skip finished tables and continue partial ones from the journal"
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true",
+        help="print the DDL and load order without touching the target"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="MERGE only the rows changed since the last recorded watermark"
+    )
+    parser.add_argument(
+        "--watermark", default="",
+        help="change-tracking column, and/or TABLE=COLUMN pairs (default: ORA_ROWSCN)"
+    )
+    parser.add_argument(
+        "--watermark-lag", type=float, default=WATERMARK_LAG,
+        help="re-read this far below a configured column's watermark "
+             "(seconds for dates, values for numbers)"
+    )
+    parser.add_argument(
+        "--track-changes", action="store_true",
+        help="record each table's watermark on a full load for later --incremental runs"
+    )
+    parser.add_argument(
+        "--sync-state", default=SYNC_STATE_PATH,
+        help="SQLite file keeping the watermarks between runs"
+    )
+    parser.add_argument(
+        "--metrics", default=METRICS_PATH,
+        help="append per-table stage timings here as JSON lines ('' to disable)"
+    )
+    parser.add_argument(
+        "--validate", action="store_true",
+        help="compare row counts and hash buckets of source and target after loading"
+    )
+    parser.add_argument(
+        "--validate-only", action="store_true",
+        help="only run the validation, without loading anything"
+    )
+    parser.add_argument(
+        "--buckets", type=int, default=VALIDATION_BUCKETS,
+        help="hash buckets per table for validation"
+    )
+    parser.add_argument(
+        "--report", default=VALIDATION_REPORT,
+        help="where the JSON validation report is written"
+    )
+    args = parser.parse_args(argv)
+
+    if args.chunks > 1 and not args.chunk_parallel:
+        args.chunk_parallel = min(args.chunks, 4)
+    if args.load_mode == "direct" and args.chunks > 1:
+        # direct-path inserts lock the whole table, chunks would just queue
+        parser.error("--load-mode direct cannot be combined with --chunks")
+    if args.nologging and args.load_mode != "direct":
+        parser.error("--nologging needs --load-mode direct")
+    if args.incremental and (
+        args.chunks > 1 or args.load_mode == "direct" or args.journal or args.resume
+    ):
+        # a sync is a set of idempotent MERGEs: rerunning it is the resume
+        parser.error(
+            "--incremental cannot be combined with --chunks, --load-mode direct or the journal"
+        )
+    if args.incremental and args.track_changes:
+        parser.error("--track-changes is for full loads; --incremental always records")
+    return args
+
+
+def main(argv=None) -> int:
+    global BATCH_SIZE, MEMORY_BUDGET_MB, COMMIT_ROWS, LOAD_MODE, NOLOGGING
+    global LOB_INLINE_BYTES, WATERMARK_COLUMN
+
+    args = parse_args(argv)
+    BATCH_SIZE = args.batch_size
+    MEMORY_BUDGET_MB = args.memory_mb
+    COMMIT_ROWS = args.commit_rows
+    LOB_INLINE_BYTES = args.lob_inline_kb * 1024
+    LOAD_MODE = args.load_mode
+    NOLOGGING = args.nologging
+    if args.watermark:
+        WATERMARK_COLUMN, columns = parse_watermarks(args.watermark)
+        WATERMARK_COLUMNS.update(columns)
+
+    # ---- INIT ORACLE CLIENT (THICK)
+    oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_PATH)
+
+    if args.dry_run:
+        dry_run(source_schema(), args)
+        return 0
+
+    if args.validate_only:
+        schema = source_schema()
+        return 0 if run_validation(schema, schema.table_names(), args) else 1
+
+    journal = None
+    if args.journal or args.resume:
+        journal = Journal(args.journal or JOURNAL_PATH)
+        if not args.resume:
+            journal.clear()
+        print(f"📝 Journal: {journal.path} ({'resume' if args.resume else 'fresh run'})")
+
+    watermarks = None
+    if args.incremental or args.track_changes:
+        watermarks = Watermarks(
+            args.sync_state, TGT_DB["user"], WATERMARK_COLUMN, WATERMARK_COLUMNS,
+            args.watermark_lag
+        )
+        print(f"🔖 Watermarks: {watermarks.path}")
+
+    metrics = MetricsLog(args.metrics or None)
+
+    if args.parallel > 1 or args.chunks > 1 or LOAD_MODE == "direct":
+        # one extra connection per pool for the table that drives a chunked copy
+        degree = max(args.parallel, args.chunk_parallel)
+        src_pool, tgt_pool = create_pools(SRC_DB, TGT_DB, degree + 1)
+        print(f"✅ Connection pools ready (parallel={args.parallel})")
+
+        src_conn = src_pool.acquire()
+        tgt_conn = tgt_pool.acquire()
+        try:
+            src_cur = src_conn.cursor()
+            with metrics.timed("metadata"):
+                schema = load_schema(src_cur, SRC_SCHEMA, SCHEMA_CACHE_DIR)
+            src_cur.close()
+            tables = schema.table_names()
+            print(f"📦 Found {len(tables)} tables in source")
+
+            # ---- Chunked tables one at a time, each using every worker
+            chunked = []
+            if args.chunks > 1:
+                wanted = {t.strip().upper() for t in args.chunk_tables.split(",") if t.strip()}
+                chunked = [t for t in tables if not wanted or t in wanted]
+
+            worker = partial(
+                migrate_table_chunked,
+                schema=schema,
+                src_pool=src_pool,
+                tgt_pool=tgt_pool,
+                chunks=args.chunks,
+                degree=args.chunk_parallel,
+                journal=journal,
+                watermarks=watermarks,
+                metrics=metrics
+            )
+            results = run_serial(src_conn, tgt_conn, chunked, worker)
+        finally:
+            src_pool.release(src_conn)
+            tgt_pool.release(tgt_conn)
+
+        rest = [t for t in tables if t not in chunked]
+        results += run_parallel(
+            rest, src_pool, tgt_pool,
+            table_worker(schema, journal, watermarks, args.incremental, metrics),
+            args.parallel, schema.sizes()
+        )
+
+        if LOAD_MODE == "direct":
+            loaded = [r.table for r in results if r.status != "failed"]
+            build_seconds, ddl_failures = build_deferred(
+                tgt_pool, schema.deferred_ddl(), loaded, args.parallel, NOLOGGING
+            )
+            print_timings(results, build_seconds)
+            for table, seconds in build_seconds.items():
+                metrics.record("ddl", seconds, table=table)
+            mark_failed(results, ddl_failures)
+
+        src_pool.close()
+        tgt_pool.close()
+    else:
+        src_conn = oracledb.connect(**SRC_DB)
+        tgt_conn = oracledb.connect(**TGT_DB)
+        print("✅ Connected to Source and Target databases")
+
+        src_cur = src_conn.cursor()
+        with metrics.timed("metadata"):
+            schema = load_schema(src_cur, SRC_SCHEMA, SCHEMA_CACHE_DIR)
+        src_cur.close()
+        tables = schema.table_names()
+        print(f"📦 Found {len(tables)} tables in source")
+
+        results = run_serial(
+            src_conn, tgt_conn, tables,
+            table_worker(schema, journal, watermarks, args.incremental, metrics)
+        )
+
+        src_conn.close()
+        tgt_conn.close()
+
+    if journal:
+        journal.close()
+    if watermarks:
+        watermarks.close()
+
+    print_summary(results)
+
+    valid = True
+    if args.validate:
+        loaded = [r.table for r in results if r.status != "failed"]
+        with metrics.timed("validate"):
+            valid = run_validation(schema, loaded, args)
+    metrics.summary()
+    metrics.close()
+
+    if any(r.status == "failed" for r in results):
+        print("\n💥 Migration finished with failures")
+        return 1
+    if not valid:
+        print("\n💥 Migration finished but validation found differences")
+        return 1
+
+    print("\n🎯 Migration completed successfully")
+    return 0
+
 
-print("\n🎯 Migration completed successfully")
+if __name__ == "__main__":
+    sys.exit(main())
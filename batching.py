@@ -0,0 +1,181 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import oracledb
+
+from lob_copy import LOB_TYPES
+from metrics import Histogram, StageTimer
+
+# ----------------------------
+# ADAPTIVE BATCH SIZING
+# ----------------------------
+#
+# A batch is sized so that one fetched array of rows fits a memory budget.
+# The size comes from user_tab_columns.data_length, an upper bound for
+# everything but LOBs, and is fixed on the cursor before the query runs.
+# The width observed on the first batch only feeds the byte counters.
+
+MIN_BATCH = 100
+MAX_BATCH = 50000
+
+# Rough per-value cost of a Python object on top of its payload
+VALUE_OVERHEAD = 56
+
+FIXED_WIDTHS = {
+    "NUMBER": 22,
+    "FLOAT": 22,
+    "DATE": 7,
+    "BINARY_FLOAT": 4,
+    "BINARY_DOUBLE": 8,
+}
+
+
+def column_width(dtype: str, length, lob_width: int = 0) -> int:
+    if dtype in LOB_TYPES and lob_width:
+        return lob_width
+    if dtype in FIXED_WIDTHS:
+        return FIXED_WIDTHS[dtype]
+    if dtype.startswith("TIMESTAMP"):
+        return 13
+    return length or 22
+
+
+def row_width(columns: List[Tuple], lob_width: int = 0) -> int:
+    """Estimated in-memory bytes of one fetched row; LOBs count as `lob_width` when given."""
+    return sum(
+        column_width(col[1], col[2], lob_width) + VALUE_OVERHEAD for col in columns
+    ) or 1
+
+
+def observed_width(rows: list, sample: int = 50) -> int:
+    """In-memory bytes per row measured on the first rows of a batch."""
+    picked = rows[:sample]
+    if not picked:
+        return 1
+    total = 0
+    for row in picked:
+        for value in row:
+            if value is None:
+                total += 8
+            elif isinstance(value, (str, bytes)):
+                total += len(value) + VALUE_OVERHEAD
+            else:
+                total += VALUE_OVERHEAD
+    return max(total // len(picked), 1)
+
+
+def batch_size(width: int, memory_budget: int) -> int:
+    return max(MIN_BATCH, min(MAX_BATCH, memory_budget // max(width, 1)))
+
+
+def configure_fetch(cur, batch: int) -> None:
+    # set before execute() and never changed afterwards, so every
+    # fetchmany(batch) is one round trip; prefetchrows keeps its default
+    # since a second buffer of `batch` rows would double fetch memory
+    cur.arraysize = batch
+
+
+# inline LOB values are bound as LONG so every batch binds alike
+LONG_BINDS = {
+    "CLOB": oracledb.DB_TYPE_LONG,
+    "NCLOB": oracledb.DB_TYPE_LONG_NVARCHAR,
+    "BLOB": oracledb.DB_TYPE_LONG_RAW,
+}
+
+
+def input_sizes(columns: List[Tuple], lob_binds: Optional[Dict] = None) -> list:
+    """setinputsizes() arguments so binds keep one type for the whole load."""
+    lob_binds = lob_binds or LONG_BINDS
+    sizes = []
+    for col in columns:
+        dtype, length = col[1], col[2]
+        if dtype in ("VARCHAR2", "NVARCHAR2", "CHAR", "NCHAR"):
+            sizes.append(length)
+        elif dtype in ("NUMBER", "FLOAT"):
+            sizes.append(oracledb.DB_TYPE_NUMBER)
+        elif dtype == "DATE":
+            sizes.append(oracledb.DB_TYPE_DATE)
+        elif dtype.startswith("TIMESTAMP"):
+            sizes.append(oracledb.DB_TYPE_TIMESTAMP)
+        elif dtype in lob_binds:
+            sizes.append(lob_binds[dtype])
+        else:
+            sizes.append(None)
+    return sizes
+
+
+def bind_input_sizes(cur, columns: List[Tuple], lob_binds: Optional[Dict] = None) -> None:
+    sizes = input_sizes(columns, lob_binds)
+    if isinstance(cur, oracledb.Cursor):
+        cur.setinputsizes(*sizes)
+    else:
+        # plain DB-API signature: setinputsizes(sizes)
+        cur.setinputsizes(sizes)
+
+
+class TableStats:
+    """Rows and bytes moved for one table, shared by all of its chunks, with per-stage timings."""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.rows = 0
+        self.bytes = 0
+        self.batches = 0
+        self.commits = 0
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        self.stages: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def timed(self, stage: str, rows: int = 0, nbytes: int = 0) -> StageTimer:
+        return StageTimer(self, stage, rows, nbytes)
+
+    def record(self, stage: str, seconds: float, rows: int = 0, nbytes: int = 0) -> None:
+        with self._lock:
+            self.stages.setdefault(stage, Histogram()).add(seconds, rows, nbytes)
+
+    def add_batch(self, rows: int, width: int) -> None:
+        with self._lock:
+            self.rows += rows
+            self.bytes += rows * width
+            self.batches += 1
+
+    def add_bytes(self, amount: int) -> None:
+        with self._lock:
+            self.bytes += amount
+
+    def add_commit(self) -> None:
+        with self._lock:
+            self.commits += 1
+
+    def stop(self) -> None:
+        self.seconds = time.perf_counter() - self.start
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1e6 / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "table": self.table,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "seconds": round(self.seconds, 3),
+            "rows_per_sec": round(self.rows_per_sec, 1),
+            "bytes_per_sec": round(self.bytes / self.seconds, 1) if self.seconds else 0.0,
+            "batches": self.batches,
+            "commits": self.commits,
+            "stages": {name: hist.to_dict() for name, hist in self.stages.items()},
+        }
+
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows, {self.bytes / 1e6:.1f} MB in {self.seconds:.1f}s "
+            f"({self.rows_per_sec:,.0f} rows/s, {self.mb_per_sec:.1f} MB/s, "
+            f"{self.batches} batches, {self.commits} commits)"
+        )
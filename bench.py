@@ -0,0 +1,327 @@
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import shutil
+import sqlite3
+import string
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Dict, List
+
+import app1
+from metadata import Column, build_create_sql, load_schema
+from metrics import MetricsLog
+from parallel import run_parallel
+
+# ----------------------------
+# COPY ENGINE BENCHMARK
+# ----------------------------
+#
+# Generates synthetic source schemas in SQLite, shaped like the dictionary
+# views the loader reads (all_tables, all_tab_columns, all_constraints),
+# and runs the app1.py copy engine against them for every combination of
+# batch size, parallel degree and load mode asked for. The data comes
+# from a fixed seed, so two runs of the same command copy the same bytes
+# and only the engine settings differ. SQLite is no Oracle: use the
+# numbers to compare settings with each other, not to predict a real
+# migration.
+#
+#   python bench.py --profiles narrow,wide --batch-size 0,500,5000 --parallel 1,4
+
+OWNER = app1.SRC_SCHEMA
+
+
+def _number(name: str, precision: int = 12, scale: int = 2) -> Column:
+    return Column(name, "NUMBER", 22, precision, scale, "Y")
+
+
+def _varchar(name: str, length: int) -> Column:
+    return Column(name, "VARCHAR2", length, None, None, "Y", length, "B")
+
+
+ID = Column("ID", "NUMBER", 22, 10, 0, "N")
+
+PROFILES: Dict[str, List[Column]] = {
+    "narrow": [ID, _varchar("NAME", 40), _number("AMT")],
+    "wide": [ID] + [
+        col
+        for i in range(1, 21)
+        for col in (
+            _number(f"N{i:02}"),
+            _varchar(f"S{i:02}", 60),
+            Column(f"D{i:02}", "DATE", 7, None, None, "Y"),
+        )
+    ],
+    "numeric": [ID] + [_number(f"N{i:02}", 18, 4) for i in range(1, 31)],
+    "varchar": [ID] + [_varchar(f"S{i:02}", 200) for i in range(1, 21)],
+    "lob": [
+        ID,
+        _varchar("NAME", 40),
+        Column("DOC", "CLOB", 4000, None, None, "Y"),
+        Column("BIN", "BLOB", 4000, None, None, "Y"),
+    ],
+}
+
+# LOB rows are far bigger, so the lob profile copies fewer of them
+ROW_FACTOR = {"lob": 0.1}
+LOB_MAX_BYTES = 32 * 1024
+
+DICTIONARY = """
+CREATE TABLE all_tables (owner, table_name, num_rows);
+CREATE TABLE all_tab_columns (
+    owner, table_name, column_name, column_id, data_type, data_length,
+    data_precision, data_scale, nullable, char_length, char_used
+);
+CREATE TABLE all_constraints (
+    owner, constraint_name, table_name, constraint_type, search_condition,
+    r_constraint_name, index_name, generated
+);
+CREATE TABLE all_cons_columns (owner, constraint_name, table_name, column_name, position);
+"""
+
+
+class SQLitePool:
+    """acquire()/release() over a SQLite file, enough for the scheduler."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def acquire(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def release(self, conn) -> None:
+        conn.close()
+
+
+def value(rng: random.Random, col: Column, row_id: int):
+    if col.name == "ID":
+        return row_id
+    if rng.random() < 0.05 and col.nullable == "Y":
+        return None
+    if col.data_type == "NUMBER":
+        return round(rng.uniform(-10 ** 6, 10 ** 6), col.data_scale or 0)
+    if col.data_type == "VARCHAR2":
+        size = rng.randint(1, col.data_length)
+        return "".join(rng.choices(string.ascii_letters + string.digits, k=size))
+    if col.data_type == "DATE":
+        moment = datetime(2000, 1, 1) + timedelta(seconds=rng.randint(0, 25 * 365 * 86400))
+        return moment.isoformat(sep=" ")
+    if col.data_type == "CLOB":
+        return rng.choice(string.ascii_lowercase) * rng.randint(1, LOB_MAX_BYTES)
+    if col.data_type == "BLOB":
+        return rng.randbytes(rng.randint(1, LOB_MAX_BYTES))
+    raise ValueError(f"no generator for {col.data_type}")
+
+
+def build_source(path: str, profile: str, tables: int, rows: int, seed: int) -> None:
+    columns = PROFILES[profile]
+    rows = max(1, int(rows * ROW_FACTOR.get(profile, 1)))
+    rng = random.Random(f"{seed}:{profile}")
+
+    conn = sqlite3.connect(path)
+    conn.executescript(DICTIONARY)
+    for t in range(1, tables + 1):
+        table = f"{profile.upper()}_{t:02}"
+        conn.execute(build_create_sql(table, columns))
+        conn.executemany(
+            f"INSERT INTO {table} VALUES ({', '.join('?' * len(columns))})",
+            ([value(rng, col, i) for col in columns] for i in range(1, rows + 1))
+        )
+        conn.execute("INSERT INTO all_tables VALUES (?, ?, ?)", (OWNER, table, rows))
+        conn.executemany(
+            "INSERT INTO all_tab_columns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(OWNER, table, c.name, i + 1, *c[1:]) for i, c in enumerate(columns)]
+        )
+        conn.execute(
+            "INSERT INTO all_constraints VALUES (?, ?, ?, 'P', NULL, NULL, ?, 'USER NAME')",
+            (OWNER, f"{table}_PK", table, f"{table}_PK")
+        )
+        conn.execute(
+            "INSERT INTO all_cons_columns VALUES (?, ?, ?, 'ID', 1)",
+            (OWNER, f"{table}_PK", table)
+        )
+    conn.commit()
+    conn.close()
+
+
+def source_path(workdir: str, profile: str, args) -> str:
+    """Generated once per profile/size/seed and reused by every case."""
+    path = os.path.join(
+        workdir, f"src_{profile}_{args.tables}x{args.rows}_s{args.seed}.db"
+    )
+    if not os.path.exists(path):
+        print(f"🧪 Generating {profile} source ({args.tables} tables)")
+        build_source(f"{path}.tmp", profile, args.tables, args.rows, args.seed)
+        os.replace(f"{path}.tmp", path)
+    return path
+
+
+def run_case(source: str, workdir: str, case: dict, metrics_path: str, verbose: bool) -> dict:
+    target = os.path.join(workdir, "target.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+
+    app1.BATCH_SIZE = case["batch_size"]
+    app1.LOAD_MODE = case["load_mode"]
+    app1.MEMORY_BUDGET_MB = case["memory_mb"]
+
+    src_pool, tgt_pool = SQLitePool(source), SQLitePool(target)
+    metrics = MetricsLog(metrics_path)
+    metrics.emit("case", **case)
+
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        conn = src_pool.acquire()
+        with metrics.timed("metadata"):
+            schema = load_schema(conn.cursor(), OWNER)
+        src_pool.release(conn)
+
+        start = time.perf_counter()
+        results = run_parallel(
+            schema.table_names(), src_pool, tgt_pool,
+            partial(app1.migrate_table, schema=schema, metrics=metrics),
+            case["parallel"], schema.sizes()
+        )
+        seconds = time.perf_counter() - start
+        metrics.summary()
+    metrics.close()
+
+    failed = [r for r in results if r.status != "ok"]
+    if failed:
+        raise RuntimeError(f"{failed[0].table}: {failed[0].error}")
+
+    totals = metrics.stage_totals()
+    rows = sum(s.rows for s in metrics.tables)
+    nbytes = sum(s.bytes for s in metrics.tables)
+    return {
+        **case,
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        "mb_per_sec": round(nbytes / 1e6 / seconds, 2) if seconds else 0.0,
+        "stages": {name: round(h.seconds, 3) for name, h in totals.items()},
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the app1.py copy engine on synthetic SQLite schemas"
+    )
+    parser.add_argument(
+        "--profiles", default=",".join(PROFILES),
+        help=f"comma-separated schema shapes ({', '.join(PROFILES)})"
+    )
+    parser.add_argument("--tables", type=int, default=4, help="tables per profile")
+    parser.add_argument("--rows", type=int, default=20000, help="rows per table")
+    parser.add_argument("--seed", type=int, default=42, help="data generator seed")
+    parser.add_argument(
+        "--batch-size", default="0",
+        help="comma-separated batch sizes to try (0: sized from row width)"
+    )
+    parser.add_argument(
+        "--parallel", default="1",
+        help="comma-separated parallel degrees to try"
+    )
+    parser.add_argument(
+        "--load-mode", default="conventional",
+        help="comma-separated load modes to try (conventional, direct)"
+    )
+    parser.add_argument(
+        "--memory-mb", type=int, default=app1.MEMORY_BUDGET_MB,
+        help="memory budget for one fetched batch, per worker"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=1,
+        help="runs per case; the fastest one is reported"
+    )
+    parser.add_argument(
+        "--workdir", default=None,
+        help="keep generated sources here and reuse them (default: a temp dir)"
+    )
+    parser.add_argument(
+        "--output", default="bench_results.jsonl",
+        help="append one JSON line per case here"
+    )
+    parser.add_argument(
+        "--metrics", default="",
+        help="also append the engine's per-table stage metrics here"
+    )
+    parser.add_argument("--verbose", action="store_true", help="show the loader's output")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.profiles.split(",")) - set(PROFILES)
+    if unknown:
+        parser.error(f"unknown profiles: {', '.join(sorted(unknown))}")
+    modes = set(args.load_mode.split(","))
+    if modes - {"conventional", "direct"}:
+        parser.error("--load-mode takes conventional and/or direct")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_")
+    os.makedirs(workdir, exist_ok=True)
+
+    cases = [
+        {
+            "profile": profile,
+            "batch_size": int(batch),
+            "parallel": int(parallel),
+            "load_mode": mode,
+            "memory_mb": args.memory_mb,
+        }
+        for profile, batch, parallel, mode in itertools.product(
+            args.profiles.split(","),
+            args.batch_size.split(","),
+            args.parallel.split(","),
+            args.load_mode.split(","),
+        )
+    ]
+
+    print(f"{'profile':<9} {'batch':>6} {'par':>4} {'mode':<12} {'rows':>8} "
+          f"{'sec':>7} {'rows/s':>10} {'MB/s':>7}  slowest stage")
+    try:
+        with open(args.output, "a", encoding="utf-8") as out:
+            for case in cases:
+                source = source_path(workdir, case["profile"], args)
+                runs = [
+                    run_case(source, workdir, case, args.metrics, args.verbose)
+                    for _ in range(max(args.repeat, 1))
+                ]
+                best = min(runs, key=lambda r: r["seconds"])
+                stage = max(best["stages"].items(), key=lambda kv: kv[1], default=("-", 0))
+                print(
+                    f"{best['profile']:<9} {best['batch_size']:>6} {best['parallel']:>4} "
+                    f"{best['load_mode']:<12} {best['rows']:>8} {best['seconds']:>7.2f} "
+                    f"{best['rows_per_sec']:>10,.0f} {best['mb_per_sec']:>7.1f}  "
+                    f"{stage[0]} {stage[1]:.2f}s"
+                )
+                out.write(json.dumps({
+                    "ts": datetime.now().isoformat(timespec="seconds"),
+                    "tables": args.tables,
+                    "seed": args.seed,
+                    "repeat": len(runs),
+                    **best,
+                }) + "\n")
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n🧾 Results appended to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
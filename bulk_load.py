@@ -0,0 +1,251 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+# ----------------------------
+# DIRECT-PATH LOAD + DEFERRED INDEXES / CONSTRAINTS
+# ----------------------------
+#
+# Targets are created with columns only, loaded with APPEND / APPEND_VALUES,
+# and only then get their indexes and constraints. Statements are rebuilt
+# from the source dictionary: phase 0 holds indexes, primary/unique keys
+# and check constraints, phase 1 the foreign keys, which need every
+# referenced key to exist first.
+
+# Errors meaning the object is already there (e.g. on a resumed run)
+ALREADY_EXISTS = ("ORA-00955", "ORA-01408", "ORA-02260", "ORA-02261", "ORA-02264", "ORA-02275")
+
+Statement = Tuple[int, str, str]  # (phase, object name, sql)
+
+# Index types rebuilt on the target, with the keyword they need; descending
+# columns make an index FUNCTION-BASED, its expressions come from
+# all_ind_expressions
+INDEX_KINDS = {
+    "NORMAL": "",
+    "NORMAL/REV": "",
+    "BITMAP": "BITMAP ",
+    "FUNCTION-BASED NORMAL": "",
+    "FUNCTION-BASED BITMAP": "BITMAP ",
+}
+
+# Created and dropped with their LOB or table, never by hand
+IMPLICIT_INDEX_TYPES = ("LOB", "IOT - TOP")
+
+# An index that can't be rebuilt is kept as a statement starting with this,
+# so the build reports it against its table instead of dropping it silently
+SKIPPED = "-- not rebuilt: "
+
+
+def insert_hint(load_mode: str, array: bool) -> str:
+    if load_mode != "direct":
+        return ""
+    return "/*+ APPEND_VALUES */ " if array else "/*+ APPEND */ "
+
+
+def set_logging(conn, table: str, logging: bool) -> None:
+    cur = conn.cursor()
+    cur.execute(f"ALTER TABLE {table} {'LOGGING' if logging else 'NOLOGGING'}")
+    cur.close()
+
+
+def _column_list(names: List[str]) -> str:
+    return ", ".join(f'"{n}"' for n in names)
+
+
+def _constraint_state(status: str, validated: str, deferrable: str, deferred: str) -> str:
+    """Clauses keeping a source constraint's state; the default is ENABLE VALIDATE."""
+    state = ""
+    if deferrable == "DEFERRABLE":
+        state += f" DEFERRABLE INITIALLY {deferred}"
+    if status == "DISABLED":
+        state += " DISABLE VALIDATE" if validated == "VALIDATED" else " DISABLE"
+    elif validated == "NOT VALIDATED":
+        state += " ENABLE NOVALIDATE"
+    return state
+
+
+def get_deferred_ddl(cur, owner: str) -> Dict[str, List[Statement]]:
+    """Index and constraint DDL for every table of `owner`, from five dictionary queries."""
+    cur.execute("""
+        SELECT constraint_name, column_name
+        FROM all_cons_columns
+        WHERE owner = :owner
+        ORDER BY constraint_name, position
+    """, {"owner": owner})
+    cons_cols: Dict[str, List[str]] = {}
+    for name, column in cur.fetchall():
+        cons_cols.setdefault(name, []).append(column)
+
+    cur.execute("""
+        SELECT table_name, constraint_name, constraint_type,
+               search_condition, r_constraint_name, index_name, generated,
+               status, validated, "DEFERRABLE", "DEFERRED"
+        FROM all_constraints
+        WHERE owner = :owner
+          AND constraint_type IN ('P', 'U', 'C', 'R')
+          AND table_name NOT LIKE 'BIN$%'
+    """, {"owner": owner})
+    constraints = cur.fetchall()
+    cons_table = {c[1]: c[0] for c in constraints}
+    constraint_indexes = {c[5] for c in constraints if c[5]}
+
+    # function-based index columns show up as hidden SYS_NC columns here
+    cur.execute("""
+        SELECT index_name, column_position, column_expression
+        FROM all_ind_expressions
+        WHERE index_owner = :owner
+    """, {"owner": owner})
+    expressions = {(name, pos): expr for name, pos, expr in cur.fetchall()}
+
+    cur.execute("""
+        SELECT index_name, column_name, column_position, descend
+        FROM all_ind_columns
+        WHERE index_owner = :owner
+        ORDER BY index_name, column_position
+    """, {"owner": owner})
+    ind_cols: Dict[str, List[str]] = {}
+    for name, column, position, descend in cur.fetchall():
+        expr = expressions.get((name, position))
+        part = expr.strip() if expr else f'"{column}"'
+        ind_cols.setdefault(name, []).append(
+            f"{part} DESC" if descend == "DESC" else part
+        )
+
+    cur.execute("""
+        SELECT table_name, index_name, index_type, uniqueness
+        FROM all_indexes
+        WHERE owner = :owner
+          AND table_owner = :owner
+          AND table_name NOT LIKE 'BIN$%'
+    """, {"owner": owner})
+    indexes = cur.fetchall()
+
+    ddl: Dict[str, List[Statement]] = {}
+
+    for table, name, index_type, uniqueness in indexes:
+        if name in constraint_indexes or index_type in IMPLICIT_INDEX_TYPES:
+            continue
+        if index_type not in INDEX_KINDS or name not in ind_cols:
+            ddl.setdefault(table, []).append(
+                (0, name, f"{SKIPPED}{index_type} index")
+            )
+            continue
+        kind = INDEX_KINDS[index_type] or ("UNIQUE " if uniqueness == "UNIQUE" else "")
+        reverse = " REVERSE" if index_type == "NORMAL/REV" else ""
+        ddl.setdefault(table, []).append((
+            0, name,
+            f'CREATE {kind}INDEX "{name}" ON {table} '
+            f'({", ".join(ind_cols[name])}){reverse}'
+        ))
+
+    for table, name, ctype, condition, r_name, _, generated, *state in constraints:
+        if ctype == "C" and generated == "GENERATED NAME" and \
+                (condition or "").rstrip().endswith("IS NOT NULL"):
+            continue  # already part of the column definition
+
+        named = "" if generated == "GENERATED NAME" else f'CONSTRAINT "{name}" '
+        cols = _column_list(cons_cols.get(name, []))
+
+        if ctype == "P":
+            body, phase = f"PRIMARY KEY ({cols})", 0
+        elif ctype == "U":
+            body, phase = f"UNIQUE ({cols})", 0
+        elif ctype == "C":
+            body, phase = f"CHECK ({condition})", 0
+        else:
+            if r_name not in cons_table:
+                continue  # references another schema
+            r_cols = _column_list(cons_cols.get(r_name, []))
+            body, phase = (
+                f"FOREIGN KEY ({cols}) REFERENCES {cons_table[r_name]} ({r_cols})", 1
+            )
+
+        ddl.setdefault(table, []).append(
+            (phase, name, f"ALTER TABLE {table} ADD {named}{body}{_constraint_state(*state)}")
+        )
+
+    return ddl
+
+
+def _build_table(pool, table: str, statements: List[Statement], nologging: bool) -> Tuple[float, List[str]]:
+    errors = []
+    start = time.perf_counter()
+    conn = pool.acquire()
+    try:
+        cur = conn.cursor()
+        for _, name, sql in statements:
+            if sql.startswith(SKIPPED):
+                errors.append(f"{name}: {sql[3:]}")
+                continue
+            index = sql.startswith("CREATE")
+            try:
+                cur.execute(f"{sql} NOLOGGING" if nologging and index else sql)
+                if nologging and index:
+                    cur.execute(f'ALTER INDEX "{name}" LOGGING')
+            except Exception as e:
+                if not any(code in str(e) for code in ALREADY_EXISTS):
+                    errors.append(f"{name}: {e}")
+        cur.close()
+    finally:
+        pool.release(conn)
+    return time.perf_counter() - start, errors
+
+
+def build_deferred(
+    pool,
+    ddl: Dict[str, List[Statement]],
+    tables: List[str],
+    degree: int,
+    nologging: bool = False
+) -> Tuple[Dict[str, float], Dict[str, List[str]]]:
+    """Build indexes and constraints across tables in parallel.
+
+    Returns the seconds spent per table and the statements that failed per
+    table; objects that already exist don't count as failures.
+    """
+    seconds = {t: 0.0 for t in tables}
+    failures: Dict[str, List[str]] = {}
+
+    for phase in (0, 1):
+        work = {
+            t: [s for s in ddl.get(t, []) if s[0] == phase]
+            for t in tables
+        }
+        work = {t: stmts for t, stmts in work.items() if stmts}
+        if not work:
+            continue
+
+        with ThreadPoolExecutor(max_workers=degree) as executor:
+            futures = {
+                executor.submit(_build_table, pool, t, stmts, nologging): t
+                for t, stmts in work.items()
+            }
+            for future in as_completed(futures):
+                table = futures[future]
+                spent, errors = future.result()
+                seconds[table] += spent
+                label = "indexes/keys" if phase == 0 else "foreign keys"
+                print(f"🏗️ {table}: {len(work[table])} {label} in {spent:.1f}s")
+                for error in errors:
+                    print(f"   ❌ {table} {error}")
+                if errors:
+                    failures.setdefault(table, []).extend(errors)
+
+    return seconds, failures
+
+
+def mark_failed(results: list, failures: Dict[str, List[str]]) -> None:
+    """A table whose indexes or constraints could not be built did not load cleanly."""
+    for r in results:
+        if r.table in failures:
+            r.status = "failed"
+            r.error = "\n".join(failures[r.table])
+
+
+def print_timings(results: list, build_seconds: Dict[str, float]) -> None:
+    print("\n⏱️ Load vs index build per table")
+    for r in sorted(results, key=lambda r: r.seconds + build_seconds.get(r.table, 0), reverse=True):
+        print(
+            f"   {r.table}: load {r.seconds:.1f}s, "
+            f"indexes/constraints {build_seconds.get(r.table, 0.0):.1f}s"
+        )
@@ -0,0 +1,155 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Tuple
+
+# ----------------------------
+# INTRA-TABLE CHUNKING
+# ----------------------------
+#
+# A table is split into inclusive key ranges with NTILE over its
+# single-column primary key, or over ROWID when there isn't one. Both are
+# unique, so the ranges never overlap and every row lands in exactly one
+# chunk. Each range is then copied by its own task on its own connection.
+#
+# NTILE sorts every key on one session before any chunk starts. For a
+# table the connected user owns, ROWID ranges are built from its extents
+# instead (as DBMS_PARALLEL_EXECUTE.CREATE_CHUNKS_BY_ROWID does), which
+# reads the dictionary and not the table. A row can't live outside its
+# segment's extents, so the ranges still cover every row.
+
+Range = Tuple[object, object]
+
+
+def chunk_ranges(cur, source: str, key: str, chunks: int) -> List[Range]:
+    """Split `source` (a table, optionally owner-qualified) into `chunks` key ranges."""
+    cur.execute(f"""
+        SELECT MIN(k), MAX(k)
+        FROM (
+            SELECT {key} AS k,
+                   NTILE(:chunks) OVER (ORDER BY {key}) AS bucket
+            FROM {source}
+        )
+        GROUP BY bucket
+        ORDER BY bucket
+    """, {"chunks": chunks})
+    return [(lo, hi) for lo, hi in cur.fetchall()]
+
+
+def rowid_ranges(cur, table: str, chunks: int) -> List[Range]:
+    """Split a table owned by the current user into `chunks` ROWID ranges of
+    about the same number of blocks; [] when user_extents has none for it."""
+    cur.execute("""
+        SELECT o.data_object_id, e.relative_fno, e.block_id, e.blocks
+        FROM user_extents e
+        JOIN user_objects o
+          ON o.object_name = e.segment_name
+         AND NVL(o.subobject_name, '-') = NVL(e.partition_name, '-')
+         AND o.object_type LIKE 'TABLE%'
+        WHERE e.segment_name = :name
+          AND e.segment_type LIKE 'TABLE%'
+        ORDER BY o.data_object_id, e.relative_fno, e.block_id
+    """, {"name": table})
+    extents = cur.fetchall()
+    total = sum(blocks for *_, blocks in extents)
+    if not total:
+        return []
+
+    # walk the extents in ROWID order, cutting every `per_chunk` blocks
+    per_chunk = -(-total // chunks)
+    bounds, start, need = [], None, per_chunk
+    for obj, fno, block, blocks in extents:
+        while blocks:
+            if start is None:
+                start = (obj, fno, block)
+            take = min(blocks, need)
+            block, blocks, need = block + take, blocks - take, need - take
+            if not need:
+                bounds.append((start, (obj, fno, block - 1)))
+                start, need = None, per_chunk
+    if start is not None:
+        bounds.append((start, (obj, fno, block - 1)))
+
+    ranges = []
+    for (lo_obj, lo_fno, lo_block), (hi_obj, hi_fno, hi_block) in bounds:
+        cur.execute("""
+            SELECT DBMS_ROWID.ROWID_CREATE(1, :lo_obj, :lo_fno, :lo_block, 0),
+                   DBMS_ROWID.ROWID_CREATE(1, :hi_obj, :hi_fno, :hi_block, 32767)
+            FROM dual
+        """, {
+            "lo_obj": lo_obj, "lo_fno": lo_fno, "lo_block": lo_block,
+            "hi_obj": hi_obj, "hi_fno": hi_fno, "hi_block": hi_block,
+        })
+        lo, hi = cur.fetchone()
+        ranges.append((lo, hi))
+    return ranges
+
+
+def range_predicate(key: str) -> str:
+    return f"WHERE {key} BETWEEN :lo AND :hi"
+
+
+class ChunkTracker:
+    """Thread-safe record of which chunks of a table finished and how many rows each moved."""
+
+    def __init__(self, table: str, ranges: List[Range]):
+        self.table = table
+        self.ranges = ranges
+        self.rows: Dict[int, int] = {}
+        self.errors: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def done(self, index: int, rows: int) -> None:
+        with self._lock:
+            self.rows[index] = rows
+
+    def failed(self, index: int, error: str) -> None:
+        with self._lock:
+            self.errors[index] = error
+
+    @property
+    def complete(self) -> bool:
+        return len(self.rows) == len(self.ranges)
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.rows.values())
+
+    def pending(self) -> List[int]:
+        return [i for i in range(len(self.ranges)) if i not in self.rows]
+
+    def raise_if_incomplete(self) -> None:
+        if self.complete:
+            return
+        first = self.errors[min(self.errors)] if self.errors else "not run"
+        raise RuntimeError(
+            f"{len(self.pending())} of {len(self.ranges)} chunks of "
+            f"{self.table} did not finish ({self.total_rows} rows committed): "
+            f"{first}"
+        )
+
+
+def run_chunks(
+    table: str,
+    ranges: List[Range],
+    task: Callable,
+    degree: int
+) -> ChunkTracker:
+    """Run task(index, lo, hi) -> rows for every range on `degree` workers."""
+    tracker = ChunkTracker(table, ranges)
+
+    def run(index: int, lo, hi) -> None:
+        try:
+            tracker.done(index, task(index, lo, hi))
+        except Exception as e:
+            tracker.failed(index, f"{e}\n{traceback.format_exc()}")
+
+    with ThreadPoolExecutor(max_workers=degree) as executor:
+        futures = [
+            executor.submit(run, i, lo, hi)
+            for i, (lo, hi) in enumerate(ranges)
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+    return tracker
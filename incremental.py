@@ -0,0 +1,232 @@
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from metadata import Column, TableMeta
+
+# ----------------------------
+# INCREMENTAL SYNC
+# ----------------------------
+#
+# Each table has a watermark column: a modified timestamp or sequence set
+# in the configuration, or ORA_ROWSCN when it has none. Before a table is
+# read, the current MAX(watermark) is taken as the upper bound. Only rows
+# above the previously stored watermark and up to that bound are
+# extracted, then applied to the target with MERGE on the primary key.
+# The bound is kept as "pending" while the table is applied and becomes
+# the stored watermark once it is. Full loads can record the same bound so
+# the first sync after them only reads what changed since.
+#
+# ORA_ROWSCN is set at commit, so a row committed after the bound was read
+# is above it and the next sync picks it up. A configured column is set
+# when the row is written: a transaction still open when MAX() is read can
+# commit a row stamped below the bound afterwards, and the watermark would
+# already be past it. For those columns every sync therefore re-reads a
+# lag window below the stored watermark (seconds for DATE/TIMESTAMP
+# columns, values for numeric ones), which must be longer than any
+# transaction writing the table.
+#
+# MERGE is idempotent, so re-reading rows is harmless. That is why the lag
+# window is safe, and why ORA_ROWSCN works here: without ROWDEPENDENCIES
+# it is tracked per block and over-reports changed rows. Deleted rows
+# leave no watermark and are not propagated.
+
+ROWSCN = "ORA_ROWSCN"
+
+STATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watermarks (
+    target      TEXT NOT NULL,
+    table_name  TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    value,
+    kind        TEXT,
+    pending,
+    pending_kind TEXT,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT,
+    PRIMARY KEY (target, table_name)
+);
+"""
+
+
+def parse_watermarks(spec: str) -> Tuple[str, Dict[str, str]]:
+    """'COL' or 'TABLE=COL,...' (mixed allowed) -> (default column, per-table columns)."""
+    default, per_table = "", {}
+    for item in (s.strip() for s in spec.split(",")):
+        if not item:
+            continue
+        if "=" in item:
+            table, column = (p.strip().upper() for p in item.split("=", 1))
+            per_table[table] = column
+        else:
+            default = item.upper()
+    return default, per_table
+
+
+def _encode(value) -> Tuple[object, Optional[str]]:
+    # DATE/TIMESTAMP watermarks come back as datetime, which SQLite can't store
+    if isinstance(value, datetime):
+        return value.isoformat(), "datetime"
+    return value, None
+
+
+def _decode(value, kind: Optional[str]):
+    if value is not None and kind == "datetime":
+        return datetime.fromisoformat(value)
+    return value
+
+
+class Watermarks:
+    """Watermark columns per table plus the values stored between runs."""
+
+    def __init__(
+        self,
+        path: str,
+        target: str,
+        default_column: str = "",
+        columns: Optional[Dict[str, str]] = None,
+        lag: float = 0
+    ):
+        self.path = path
+        self.target = target
+        self.default_column = default_column
+        self.columns = columns or {}
+        self.lag = lag
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(STATE_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def column(self, meta: TableMeta) -> str:
+        names = {col.name for col in meta.columns}
+        if meta.name in self.columns:
+            return self.columns[meta.name]
+        if self.default_column in names:
+            return self.default_column
+        return ROWSCN
+
+    def get(self, table: str, column: str):
+        """Last stored watermark, or None when the table (or its column) is new."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM watermarks WHERE target = ? AND table_name = ?",
+                (self.target, table)
+            ).fetchone()
+        if row is None or row["column_name"] != column:
+            return None
+        return _decode(row["value"], row["kind"])
+
+    def begin(self, table: str, column: str, upto, resume: bool = False):
+        """Record the upper bound of a load in progress; returns the bound to use.
+
+        A resumed full load keeps the bound taken when it first started, since
+        the rows it already copied were read against that bound.
+        """
+        stored, kind = _encode(upto)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM watermarks WHERE target = ? AND table_name = ?",
+                (self.target, table)
+            ).fetchone()
+            if resume and row is not None and row["column_name"] == column \
+                    and row["pending"] is not None:
+                return _decode(row["pending"], row["pending_kind"])
+            if row is not None and row["column_name"] != column:
+                # a different column's value means nothing for this one
+                self._conn.execute(
+                    "DELETE FROM watermarks WHERE target = ? AND table_name = ?",
+                    (self.target, table)
+                )
+            self._conn.execute("""
+                INSERT INTO watermarks
+                    (target, table_name, column_name, pending, pending_kind, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (target, table_name) DO UPDATE
+                   SET pending = excluded.pending,
+                       pending_kind = excluded.pending_kind,
+                       updated_at = excluded.updated_at
+            """, (self.target, table, column, stored, kind, _now()))
+            self._conn.commit()
+        return upto
+
+    def finish(self, table: str, rows: int) -> None:
+        """The pending bound is now applied to the target: make it the watermark."""
+        self._write("""
+            UPDATE watermarks
+               SET value = pending, kind = pending_kind, pending = NULL,
+                   pending_kind = NULL, rows = ?, updated_at = ?
+             WHERE target = ? AND table_name = ? AND pending IS NOT NULL
+        """, (rows, _now(), self.target, table))
+
+    def _write(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+def _expr(column: str) -> str:
+    return column if column == ROWSCN else f'"{column}"'
+
+
+def high_watermark(cur, source: str, column: str):
+    """Current MAX(watermark) of a table; None when it is empty."""
+    cur.execute(f"SELECT MAX({_expr(column)}) FROM {source}")
+    return cur.fetchone()[0]
+
+
+def _lagged(column: str, since, lag: float):
+    """`since` moved back by the lag window; ORA_ROWSCN needs none."""
+    if column == ROWSCN or not lag or since is None:
+        return since
+    if isinstance(since, datetime):
+        return since - timedelta(seconds=lag)
+    if isinstance(since, (int, float, Decimal)):
+        return since - type(since)(lag)
+    return since  # e.g. a VARCHAR2 stamp: nothing to subtract
+
+
+def unchanged(column: str, since, upto, lag: float = 0) -> bool:
+    """Nothing to sync: the table is empty, or nothing is above `since` and
+    there is no lag window to re-read."""
+    if upto is None:
+        return True
+    return since is not None and upto <= since and _lagged(column, since, lag) == since
+
+
+def changed_predicate(column: str, since, upto, lag: float = 0) -> Tuple[str, dict]:
+    """WHERE clause for the rows changed after `since` (less the lag window), up to `upto`."""
+    expr = _expr(column)
+    if since is None:
+        # first sync: everything up to the bound, including rows never stamped
+        return f"WHERE ({expr} <= :upto OR {expr} IS NULL)", {"upto": upto}
+    since = _lagged(column, since, lag)
+    return f"WHERE {expr} > :since AND {expr} <= :upto", {"since": since, "upto": upto}
+
+
+def bind_row(columns: List[Column]) -> str:
+    """USING source for a client-side MERGE: one row of positional binds."""
+    values = ", ".join(f':{i + 1} AS "{col.name}"' for i, col in enumerate(columns))
+    return f"SELECT {values} FROM dual"
+
+
+def merge_sql(table: str, columns: List[Column], key: List[str], using: str) -> str:
+    on = " AND ".join(f't."{k}" = s."{k}"' for k in key)
+    names = [col.name for col in columns]
+    updates = ", ".join(f't."{n}" = s."{n}"' for n in names if n not in key)
+    insert_cols = ", ".join(f'"{n}"' for n in names)
+    insert_vals = ", ".join(f's."{n}"' for n in names)
+
+    sql = f"MERGE INTO {table} t USING ({using}) s ON ({on})"
+    if updates:
+        sql += f" WHEN MATCHED THEN UPDATE SET {updates}"
+    return sql + f" WHEN NOT MATCHED THEN INSERT ({insert_cols}) VALUES ({insert_vals})"
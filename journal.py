@@ -0,0 +1,165 @@
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# ----------------------------
+# MIGRATION JOURNAL
+# ----------------------------
+#
+# Local SQLite file recording how far each table got. A whole-table copy is
+# stored as chunk -1; chunked copies store one row per key range. Every
+# checkpoint is written right after the matching target commit, so on
+# resume the target can only be ahead of the journal by the rows of one
+# commit (up to COMMIT_ROWS), which the loader deletes before continuing
+# from the recorded key.
+
+WHOLE_TABLE = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    table_name  TEXT PRIMARY KEY,
+    ddl_done    INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    chunk_key   TEXT,
+    chunks      INTEGER NOT NULL DEFAULT 1,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    table_name  TEXT NOT NULL,
+    chunk       INTEGER NOT NULL,
+    lo,
+    hi,
+    status      TEXT NOT NULL DEFAULT 'pending',
+    last_key,
+    rows        INTEGER NOT NULL DEFAULT 0,
+    updated_at  TEXT,
+    PRIMARY KEY (table_name, chunk)
+);
+"""
+
+
+class Journal:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [r["name"] for r in self._conn.execute("PRAGMA table_info(tables)")]
+        if "chunks" not in columns:
+            # journals written before the copy mode was recorded
+            self._conn.execute(
+                "ALTER TABLE tables ADD COLUMN chunks INTEGER NOT NULL DEFAULT 1"
+            )
+        self._lock = threading.Lock()
+
+    def _write(self, sql: str, params: tuple = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def _read(self, sql: str, params: tuple = ()) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+            self._conn.execute("DELETE FROM tables")
+            self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # ---- tables
+
+    def table(self, table: str) -> Optional[sqlite3.Row]:
+        rows = self._read("SELECT * FROM tables WHERE table_name = ?", (table,))
+        return rows[0] if rows else None
+
+    def mark_ddl(self, table: str, chunk_key: Optional[str], chunks: int = 1) -> None:
+        self._write("""
+            INSERT INTO tables (table_name, ddl_done, status, chunk_key, chunks, updated_at)
+            VALUES (?, 1, 'loading', ?, ?, ?)
+            ON CONFLICT (table_name) DO UPDATE
+               SET ddl_done = 1, status = 'loading', chunk_key = excluded.chunk_key,
+                   chunks = excluded.chunks, updated_at = excluded.updated_at
+        """, (table, chunk_key, chunks, _now()))
+
+    def finish_table(self, table: str, rows: int) -> None:
+        self._write("""
+            UPDATE tables SET status = 'done', rows = ?, updated_at = ?
+            WHERE table_name = ?
+        """, (rows, _now(), table))
+
+    def reset_progress(self, table: str) -> None:
+        """Forget every checkpoint of a table but keep its saved ranges."""
+        self._write("""
+            UPDATE chunks
+               SET status = 'pending', last_key = NULL, rows = 0, updated_at = ?
+             WHERE table_name = ?
+        """, (_now(), table))
+
+    def forget_chunks(self, table: str) -> None:
+        """Drop every range and checkpoint of a table, e.g. when its copy mode changed."""
+        self._write("DELETE FROM chunks WHERE table_name = ?", (table,))
+
+    # ---- chunks
+
+    def save_ranges(self, table: str, ranges: List[Tuple]) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE table_name = ?", (table,))
+            self._conn.executemany(
+                "INSERT INTO chunks (table_name, chunk, lo, hi) VALUES (?, ?, ?, ?)",
+                [(table, i, lo, hi) for i, (lo, hi) in enumerate(ranges)]
+            )
+            self._conn.commit()
+
+    def ranges(self, table: str) -> List[Tuple]:
+        rows = self._read("""
+            SELECT lo, hi FROM chunks
+            WHERE table_name = ? AND chunk >= 0
+            ORDER BY chunk
+        """, (table,))
+        return [(r["lo"], r["hi"]) for r in rows]
+
+    def chunk(self, table: str, chunk: int) -> Optional[sqlite3.Row]:
+        rows = self._read(
+            "SELECT * FROM chunks WHERE table_name = ? AND chunk = ?",
+            (table, chunk)
+        )
+        return rows[0] if rows else None
+
+    def start_chunk(self, table: str, chunk: int) -> None:
+        self._write("""
+            INSERT INTO chunks (table_name, chunk, status, updated_at)
+            VALUES (?, ?, 'loading', ?)
+            ON CONFLICT (table_name, chunk) DO UPDATE
+               SET status = 'loading', updated_at = excluded.updated_at
+        """, (table, chunk, _now()))
+
+    def checkpoint(
+        self,
+        table: str,
+        chunk: int,
+        last_key,
+        rows: int
+    ) -> None:
+        self._write("""
+            UPDATE chunks
+               SET last_key = ?, rows = ?, updated_at = ?
+             WHERE table_name = ? AND chunk = ?
+        """, (last_key, rows, _now(), table, chunk))
+
+    def finish_chunk(self, table: str, chunk: int) -> None:
+        self._write("""
+            UPDATE chunks SET status = 'done', updated_at = ?
+            WHERE table_name = ? AND chunk = ?
+        """, (_now(), table, chunk))
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,235 @@
+from typing import List, Tuple
+
+import oracledb
+
+from incremental import merge_sql
+from metadata import Column
+
+# ----------------------------
+# LOB-AWARE COPY
+# ----------------------------
+#
+# Each LOB column is selected twice: once as "<col>$I", which is only set
+# when the value fits LOB_INLINE_BYTES and is fetched inline as str/bytes,
+# and once as "<col>$L", which is only set for larger values and is
+# fetched as a locator. Rows whose LOBs all fit go through the normal array
+# insert. The rest are inserted with EMPTY_CLOB()/EMPTY_BLOB() and the
+# large values are streamed piece by piece from source to target locator,
+# so memory stays bounded by the inline limit and the stream piece size.
+# An incremental sync does the same with MERGE: large rows are merged with
+# empty LOBs one at a time, then the target locators are locked by key and
+# the values streamed into them.
+
+LOB_TYPES = ("CLOB", "NCLOB", "BLOB")
+
+INLINE_SUFFIX = "$I"
+LOCATOR_SUFFIX = "$L"
+
+INLINE_TYPES = {
+    oracledb.DB_TYPE_CLOB: oracledb.DB_TYPE_LONG,
+    oracledb.DB_TYPE_NCLOB: oracledb.DB_TYPE_LONG_NVARCHAR,
+    oracledb.DB_TYPE_BLOB: oracledb.DB_TYPE_LONG_RAW,
+}
+
+LOCATOR_TYPES = {
+    "CLOB": oracledb.DB_TYPE_CLOB,
+    "NCLOB": oracledb.DB_TYPE_NCLOB,
+    "BLOB": oracledb.DB_TYPE_BLOB,
+}
+
+
+def lob_positions(columns: List[Column]) -> List[int]:
+    return [i for i, col in enumerate(columns) if col.data_type in LOB_TYPES]
+
+
+def lob_select_list(columns: List[Column]) -> str:
+    """Select list with every LOB split into an inline and a locator expression."""
+    exprs = []
+    for col in columns:
+        name = f'"{col.name}"'
+        if col.data_type in LOB_TYPES:
+            length = f"DBMS_LOB.GETLENGTH({name})"
+            exprs.append(
+                f'CASE WHEN {length} <= :lob_limit THEN {name} END AS "{col.name}{INLINE_SUFFIX}"'
+            )
+            exprs.append(
+                f'CASE WHEN {length} > :lob_limit THEN {name} END AS "{col.name}{LOCATOR_SUFFIX}"'
+            )
+        else:
+            exprs.append(name)
+    return ", ".join(exprs)
+
+
+def inline_lob_handler(cursor, metadata):
+    """outputtypehandler fetching the "$I" columns as str/bytes instead of locators."""
+    if metadata.name.endswith(INLINE_SUFFIX) and metadata.type_code in INLINE_TYPES:
+        return cursor.var(
+            INLINE_TYPES[metadata.type_code], arraysize=cursor.arraysize
+        )
+    return None
+
+
+def empty_lob(col: Column) -> str:
+    return "EMPTY_BLOB()" if col.data_type == "BLOB" else "EMPTY_CLOB()"
+
+
+def stream_lob(src_lob, tgt_lob, piece: int) -> int:
+    """Copy one LOB in pieces of about `piece` bytes/characters; returns the amount moved."""
+    step = src_lob.getchunksize() or piece
+    amount = max(step, piece // step * step)
+    offset = 1
+    while True:
+        data = src_lob.read(offset, amount)
+        if not data:
+            break
+        tgt_lob.write(data, offset)
+        offset += len(data)
+    return offset - 1
+
+
+class LobWriter:
+    """Splits fetched rows into array-insertable ones and ones with large LOBs, and writes the latter."""
+
+    def __init__(self, tgt_conn, table: str, columns: List[Column], piece: int):
+        self.tgt_conn = tgt_conn
+        self.table = table
+        self.columns = columns
+        self.piece = piece
+        self.lobs = lob_positions(columns)
+        self.plain = [i for i in range(len(columns)) if i not in self.lobs]
+
+        values = []
+        position = 0
+        for i, col in enumerate(columns):
+            if i in self.lobs:
+                values.append(empty_lob(col))
+            else:
+                position += 1
+                values.append(f":{position}")
+        returning = ", ".join(
+            ["ROWID"] + [f'"{columns[i].name}"' for i in self.lobs]
+        )
+        into = ", ".join(
+            f":{position + j + 1}" for j in range(len(self.lobs) + 1)
+        )
+        self.insert_sql = (
+            f"INSERT INTO {table} VALUES ({', '.join(values)}) "
+            f"RETURNING {returning} INTO {into}"
+        )
+
+    def split(self, fetched: list) -> Tuple[list, list, list]:
+        """Fold each LOB's inline/locator pair back into one value.
+
+        Returns (all rows in fetch order, rows for the array insert, rows
+        with at least one large LOB).
+        """
+        rows, small, large = [], [], []
+        lobs = set(self.lobs)
+        for raw in fetched:
+            row = []
+            has_locator = False
+            pos = 0
+            for i in range(len(self.columns)):
+                if i in lobs:
+                    inline, locator = raw[pos], raw[pos + 1]
+                    pos += 2
+                    if locator is not None:
+                        has_locator = True
+                        row.append(locator)
+                    else:
+                        row.append(inline)
+                else:
+                    row.append(raw[pos])
+                    pos += 1
+            row = tuple(row)
+            rows.append(row)
+            (large if has_locator else small).append(row)
+        return rows, small, large
+
+    def merge(self, rows: list, key: List[str]) -> int:
+        """MERGE rows holding large LOBs on `key` and stream their values; returns LOB bytes moved."""
+        values = []
+        position = 0
+        for i, col in enumerate(self.columns):
+            if i in self.lobs:
+                values.append(f'{empty_lob(col)} AS "{col.name}"')
+            else:
+                position += 1
+                values.append(f':{position} AS "{col.name}"')
+        merge = merge_sql(
+            self.table, self.columns, key, f"SELECT {', '.join(values)} FROM dual"
+        )
+        names = [col.name for col in self.columns]
+        keys = [names.index(k) for k in key]
+        match = " AND ".join(f'"{k}" = :{n + 1}' for n, k in enumerate(key))
+        lob_cols = ", ".join(f'"{names[i]}"' for i in self.lobs)
+
+        cur = self.tgt_conn.cursor()
+        try:
+            moved = 0
+            for row in rows:
+                cur.execute(merge, [row[i] for i in self.plain])
+                row_key = [row[i] for i in keys]
+                cur.execute(
+                    f"SELECT {lob_cols} FROM {self.table} WHERE {match} FOR UPDATE", row_key
+                )
+                targets = cur.fetchone()
+                for j, i in enumerate(self.lobs):
+                    value = row[i]
+                    if value is None:
+                        cur.execute(
+                            f'UPDATE {self.table} SET "{names[i]}" = NULL WHERE {match}',
+                            row_key
+                        )
+                    elif isinstance(value, (str, bytes)):
+                        if value:
+                            targets[j].write(value, 1)
+                        moved += len(value)
+                    else:
+                        moved += stream_lob(value, targets[j], self.piece)
+            return moved
+        finally:
+            cur.close()
+
+    def write(self, rows: list) -> int:
+        """Insert rows holding large LOBs and stream their values; returns LOB bytes moved."""
+        cur = self.tgt_conn.cursor()
+        try:
+            out = [cur.var(oracledb.DB_TYPE_ROWID, arraysize=len(rows))]
+            out += [
+                cur.var(LOCATOR_TYPES[self.columns[i].data_type], arraysize=len(rows))
+                for i in self.lobs
+            ]
+            cur.setinputsizes(*([None] * len(self.plain) + out))
+            cur.executemany(
+                self.insert_sql,
+                [[row[i] for i in self.plain] for row in rows]
+            )
+
+            moved = 0
+            nulls = {i: [] for i in self.lobs}
+            for n, row in enumerate(rows):
+                rowid = out[0].getvalue(n)[0]
+                for j, i in enumerate(self.lobs):
+                    value = row[i]
+                    tgt_lob = out[j + 1].getvalue(n)[0]
+                    if value is None:
+                        nulls[i].append((rowid,))
+                    elif isinstance(value, (str, bytes)):
+                        if value:
+                            tgt_lob.write(value, 1)
+                        moved += len(value)
+                    else:
+                        moved += stream_lob(value, tgt_lob, self.piece)
+
+            # EMPTY_*LOB() went in for every LOB; put real NULLs back
+            for i, rowids in nulls.items():
+                if rowids:
+                    cur.executemany(
+                        f'UPDATE {self.table} SET "{self.columns[i].name}" = NULL '
+                        f"WHERE ROWID = :1",
+                        rowids
+                    )
+            return moved
+        finally:
+            cur.close()
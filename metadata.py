@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional
+
+from bulk_load import Statement, get_deferred_ddl
+
+# ----------------------------
+# SCHEMA METADATA MODEL
+# ----------------------------
+#
+# Everything the copy stages need about a schema (columns, primary keys,
+# sizes, deferred index/constraint DDL) is read with a handful of
+# schema-wide dictionary queries instead of one query per table. The model
+# is cached as JSON, keyed by a fingerprint of the LAST_DDL_TIME of every
+# table and index, so a run against an unchanged schema skips the
+# dictionary entirely.
+
+# Bumped whenever the cached model (or the DDL derived into it) changes
+# shape, so caches written by an older version are read again
+CACHE_FORMAT = 3
+
+
+class Column(NamedTuple):
+    name: str
+    data_type: str
+    data_length: int
+    data_precision: Optional[int]
+    data_scale: Optional[int]
+    nullable: str
+    char_length: int = 0
+    char_used: Optional[str] = None
+
+
+class TableMeta:
+    def __init__(
+        self,
+        name: str,
+        columns: List[Column],
+        primary_key: List[str],
+        num_rows: int = 0,
+        bytes: int = 0,
+        ddl: Optional[List[Statement]] = None
+    ):
+        self.name = name
+        self.columns = columns
+        self.primary_key = primary_key
+        self.num_rows = num_rows
+        self.bytes = bytes
+        self.ddl = ddl or []
+
+    @property
+    def size(self) -> int:
+        return self.bytes or self.num_rows
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "columns": [list(c) for c in self.columns],
+            "primary_key": self.primary_key,
+            "num_rows": self.num_rows,
+            "bytes": self.bytes,
+            "ddl": [list(s) for s in self.ddl],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "TableMeta":
+        return cls(
+            d["name"],
+            [Column(*c) for c in d["columns"]],
+            d["primary_key"],
+            d["num_rows"],
+            d["bytes"],
+            [tuple(s) for s in d["ddl"]],
+        )
+
+
+class SchemaModel:
+    def __init__(self, owner: str, fingerprint: str, tables: Dict[str, TableMeta]):
+        self.owner = owner
+        self.fingerprint = fingerprint
+        self.tables = tables
+
+    def table(self, name: str) -> TableMeta:
+        return self.tables[name]
+
+    def table_names(self) -> List[str]:
+        return sorted(self.tables)
+
+    def sizes(self) -> Dict[str, int]:
+        return {name: t.size for name, t in self.tables.items()}
+
+    def deferred_ddl(self) -> Dict[str, List[Statement]]:
+        return {name: t.ddl for name, t in self.tables.items() if t.ddl}
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "owner": self.owner,
+                "fingerprint": self.fingerprint,
+                "tables": [t.to_dict() for t in self.tables.values()],
+            }, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SchemaModel":
+        with open(path, encoding="utf-8") as f:
+            d = json.load(f)
+        tables = [TableMeta.from_dict(t) for t in d["tables"]]
+        return cls(d["owner"], d["fingerprint"], {t.name: t for t in tables})
+
+# ----------------------------
+# TYPE MAPPING + DDL
+# ----------------------------
+
+def map_oracle_type(col: Column) -> str:
+    dtype = col.data_type
+    length, precision, scale = col.data_length, col.data_precision, col.data_scale
+
+    if dtype in ("VARCHAR2", "CHAR"):
+        if col.char_used == "C":
+            return f"{dtype}({col.char_length} CHAR)"
+        return f"{dtype}({length})"
+    elif dtype in ("NVARCHAR2", "NCHAR"):
+        # data_length is in bytes; the declared size is in characters
+        return f"{dtype}({col.char_length or length})"
+    elif dtype == "RAW":
+        return f"RAW({length})"
+    elif dtype == "NUMBER":
+        if precision is not None:
+            return f"NUMBER({precision},{scale})"
+        if scale == 0:
+            return "NUMBER(*,0)"
+        return "NUMBER"
+    elif dtype == "FLOAT":
+        return f"FLOAT({precision})" if precision is not None else "FLOAT"
+    elif dtype == "DATE":
+        return "DATE"
+    elif dtype.startswith("TIMESTAMP"):
+        # data_type already reads e.g. TIMESTAMP(6) WITH TIME ZONE; rebuild it
+        # from data_scale so the fractional precision is never lost
+        suffix = re.sub(r"^TIMESTAMP(\(\d+\))?", "", dtype)
+        if scale is None:
+            return dtype
+        return f"TIMESTAMP({scale}){suffix}"
+    elif dtype in ("CLOB", "NCLOB", "BLOB", "BFILE", "LONG", "LONG RAW"):
+        return dtype
+    else:
+        return dtype  # fallback
+
+
+def build_create_sql(table: str, columns: List[Column]) -> str:
+    ddl_cols = []
+    for col in columns:
+        null_flag = "NULL" if col.nullable == "Y" else "NOT NULL"
+        ddl_cols.append(f'"{col.name}" {map_oracle_type(col)} {null_flag}')
+
+    return f"""
+        CREATE TABLE {table} (
+            {", ".join(ddl_cols)}
+        )
+    """
+
+# ----------------------------
+# DICTIONARY QUERIES
+# ----------------------------
+
+def schema_fingerprint(cur, owner: str) -> str:
+    """Hash of every table/index LAST_DDL_TIME; changes whenever the schema does."""
+    try:
+        cur.execute("""
+            SELECT object_type, object_name,
+                   TO_CHAR(last_ddl_time, 'YYYYMMDDHH24MISS')
+            FROM all_objects
+            WHERE owner = :owner
+              AND object_type IN ('TABLE', 'INDEX')
+            ORDER BY object_type, object_name
+        """, {"owner": owner})
+        rows = cur.fetchall()
+    except Exception:
+        return ""  # no dictionary to fingerprint: never trust the cache
+    return hashlib.sha1(repr((CACHE_FORMAT, rows)).encode()).hexdigest()
+
+
+def _optional(cur, sql: str, params: dict) -> list:
+    """Run a query that a stand-in database (or missing grant) may not support."""
+    try:
+        cur.execute(sql, params)
+        return cur.fetchall()
+    except Exception:
+        return []
+
+
+def _segment_bytes(cur, owner: str) -> Dict[str, int]:
+    rows = _optional(cur, """
+        SELECT segment_name, SUM(bytes)
+        FROM dba_segments
+        WHERE owner = :owner
+          AND segment_type LIKE 'TABLE%'
+        GROUP BY segment_name
+    """, {"owner": owner})
+    if not rows and _optional(cur, "SELECT USER FROM dual", {}) == [(owner,)]:
+        rows = _optional(cur, """
+            SELECT segment_name, SUM(bytes)
+            FROM user_segments
+            WHERE segment_type LIKE 'TABLE%'
+            GROUP BY segment_name
+        """, {})
+    return {name: size or 0 for name, size in rows}
+
+
+def read_schema(cur, owner: str, fingerprint: str = "") -> SchemaModel:
+    cur.execute("""
+        SELECT table_name, num_rows
+        FROM all_tables
+        WHERE owner = :owner
+          AND table_name NOT LIKE 'BIN$%'
+    """, {"owner": owner})
+    num_rows = {name: rows or 0 for name, rows in cur.fetchall()}
+
+    cur.execute("""
+        SELECT table_name, column_name, data_type, data_length,
+               data_precision, data_scale, nullable, char_length, char_used
+        FROM all_tab_columns
+        WHERE owner = :owner
+        ORDER BY table_name, column_id
+    """, {"owner": owner})
+    columns: Dict[str, List[Column]] = {}
+    for row in cur.fetchall():
+        if row[0] in num_rows:
+            columns.setdefault(row[0], []).append(Column(*row[1:]))
+
+    primary_keys: Dict[str, List[str]] = {}
+    for table, column in _optional(cur, """
+        SELECT c.table_name, cc.column_name
+        FROM all_constraints c
+        JOIN all_cons_columns cc
+          ON cc.owner = c.owner
+         AND cc.constraint_name = c.constraint_name
+        WHERE c.owner = :owner
+          AND c.constraint_type = 'P'
+        ORDER BY c.table_name, cc.position
+    """, {"owner": owner}):
+        primary_keys.setdefault(table, []).append(column)
+
+    segment_bytes = _segment_bytes(cur, owner)
+
+    try:
+        ddl = get_deferred_ddl(cur, owner)
+    except Exception:
+        ddl = {}
+
+    tables = {
+        name: TableMeta(
+            name,
+            columns.get(name, []),
+            primary_keys.get(name, []),
+            num_rows[name],
+            segment_bytes.get(name, 0),
+            ddl.get(name, []),
+        )
+        for name in num_rows
+    }
+    return SchemaModel(owner, fingerprint, tables)
+
+
+def load_schema(cur, owner: str, cache_dir: Optional[str] = None) -> SchemaModel:
+    """Schema model from the cache when the fingerprint still matches, else from the dictionary."""
+    fingerprint = schema_fingerprint(cur, owner)
+    path = os.path.join(cache_dir, f"{owner}.json") if cache_dir else None
+
+    if path and fingerprint and os.path.exists(path):
+        try:
+            cached = SchemaModel.load(path)
+        except (OSError, ValueError, KeyError, TypeError):
+            cached = None
+        if cached is not None and cached.fingerprint == fingerprint:
+            print(f"🗂️ Schema metadata for {owner} loaded from cache ({len(cached.tables)} tables)")
+            return cached
+
+    model = read_schema(cur, owner, fingerprint)
+    print(f"🗂️ Schema metadata for {owner} read from dictionary ({len(model.tables)} tables)")
+
+    if path and fingerprint:
+        os.makedirs(cache_dir, exist_ok=True)
+        model.save(path)
+    return model
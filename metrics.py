@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# ----------------------------
+# STAGE INSTRUMENTATION
+# ----------------------------
+#
+# Every timed call (metadata query, CREATE, fetchmany, executemany,
+# commit, index build) lands in a per-stage latency histogram together
+# with the rows and bytes it moved. Each finished table is written as one
+# JSON line, and the run ends with a summary line plus a printed list of
+# the slowest tables and stages, so a slow table can be pinned on fetch,
+# insert, commit or DDL instead of guessed at.
+
+# Upper bounds of the latency buckets, in milliseconds
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+
+
+class Histogram:
+    """Latency histogram of one stage, plus the rows and bytes it handled."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.calls = 0
+        self.seconds = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, seconds: float, rows: int = 0, nbytes: int = 0) -> None:
+        ms = seconds * 1000
+        i = 0
+        while i < len(BUCKET_BOUNDS_MS) and ms > BUCKET_BOUNDS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.calls += 1
+        self.seconds += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.bytes += nbytes
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.calls += other.calls
+        self.seconds += other.seconds
+        self.max = max(self.max, other.max)
+        self.rows += other.rows
+        self.bytes += other.bytes
+
+    def percentile(self, p: float) -> float:
+        """Upper bound (seconds) of the bucket holding the p-th percentile call."""
+        if not self.calls:
+            return 0.0
+        wanted = p / 100 * self.calls
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted and count:
+                if i == len(BUCKET_BOUNDS_MS):
+                    return self.max
+                return min(BUCKET_BOUNDS_MS[i] / 1000, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        labels = [f"<={b}ms" for b in BUCKET_BOUNDS_MS] + [f">{BUCKET_BOUNDS_MS[-1]}ms"]
+        return {
+            "calls": self.calls,
+            "seconds": round(self.seconds, 4),
+            "max": round(self.max, 4),
+            "p50": round(self.percentile(50), 4),
+            "p95": round(self.percentile(95), 4),
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "rows_per_sec": round(self.rows / self.seconds, 1) if self.seconds else 0.0,
+            "bytes_per_sec": round(self.bytes / self.seconds, 1) if self.seconds else 0.0,
+            "histogram": {
+                label: count for label, count in zip(labels, self.counts) if count
+            },
+        }
+
+
+class StageTimer:
+    """Context manager timing one call; rows/bytes can be set inside the block."""
+
+    def __init__(self, sink, stage: str, rows: int = 0, nbytes: int = 0):
+        self.sink = sink
+        self.stage = stage
+        self.rows = rows
+        self.bytes = nbytes
+        self.start = 0.0
+
+    def __enter__(self) -> "StageTimer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.sink.record(self.stage, time.perf_counter() - self.start, self.rows, self.bytes)
+        return False
+
+
+class MetricsLog:
+    """Collects finished tables' stats, writes them as JSON lines and summarises the run."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.tables: List = []
+        self.run_stages: Dict[str, Histogram] = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def emit(self, event: str, **fields) -> None:
+        if self._file is None:
+            return
+        line = json.dumps(
+            {"ts": datetime.now().isoformat(timespec="milliseconds"), "event": event, **fields},
+            default=str
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def record(
+        self,
+        stage: str,
+        seconds: float,
+        rows: int = 0,
+        nbytes: int = 0,
+        table: Optional[str] = None
+    ) -> None:
+        """Time spent outside a table's copy: run-wide (metadata read) or after it (index builds)."""
+        with self._lock:
+            owner = next((s for s in self.tables if s.table == table), None)
+            stages = owner.stages if owner is not None else self.run_stages
+            stages.setdefault(stage, Histogram()).add(seconds, rows, nbytes)
+        self.emit("stage", stage=stage, table=table, seconds=round(seconds, 4), rows=rows)
+
+    def timed(self, stage: str) -> StageTimer:
+        return StageTimer(self, stage)
+
+    def table_done(self, stats, status: str = "ok") -> None:
+        with self._lock:
+            self.tables.append(stats)
+        self.emit("table", status=status, **stats.to_dict())
+
+    def stage_totals(self) -> Dict[str, Histogram]:
+        totals: Dict[str, Histogram] = {}
+        with self._lock:
+            sources = [s.stages for s in self.tables] + [self.run_stages]
+            for stages in sources:
+                for name, hist in stages.items():
+                    totals.setdefault(name, Histogram()).merge(hist)
+        return totals
+
+    def summary(self, top: int = 5) -> None:
+        totals = self.stage_totals()
+        slowest = sorted(self.tables, key=lambda s: s.seconds, reverse=True)[:top]
+
+        print(f"\n⏱️ Slowest tables (top {len(slowest)})")
+        for stats in slowest:
+            worst = max(stats.stages.items(), key=lambda kv: kv[1].seconds, default=None)
+            where = f", mostly {worst[0]} {worst[1].seconds:.1f}s" if worst else ""
+            print(f"   {stats.table}: {stats.seconds:.1f}s, {stats.rows} rows{where}")
+
+        print("⏱️ Time per stage")
+        for name, hist in sorted(totals.items(), key=lambda kv: kv[1].seconds, reverse=True):
+            rate = f", {hist.rows / hist.seconds:,.0f} rows/s" if hist.rows and hist.seconds else ""
+            print(
+                f"   {name}: {hist.seconds:.1f}s over {hist.calls} calls "
+                f"(p50 {hist.percentile(50) * 1000:.0f}ms, p95 "
+                f"{hist.percentile(95) * 1000:.0f}ms, max {hist.max * 1000:.0f}ms{rate})"
+            )
+
+        self.emit(
+            "summary",
+            seconds=round(time.perf_counter() - self.start, 3),
+            tables=len(self.tables),
+            rows=sum(s.rows for s in self.tables),
+            bytes=sum(s.bytes for s in self.tables),
+            slowest_tables=[s.table for s in slowest],
+            stages={name: hist.to_dict() for name, hist in totals.items()},
+        )
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
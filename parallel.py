@@ -0,0 +1,135 @@
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+import oracledb
+
+# ----------------------------
+# PARALLEL TABLE SCHEDULER
+# ----------------------------
+#
+# Pools only need acquire() / release(conn), so an oracledb pool and any
+# DB-API stand-in (e.g. SQLite wrapped in a tiny pool) both work here.
+# A worker is called as worker(src_conn, tgt_conn, table) and returns the
+# number of rows it loaded.
+
+
+class SkipTable(Exception):
+    """Raised by a worker when a table is deliberately not loaded."""
+
+
+class TableResult:
+    def __init__(
+        self,
+        table: str,
+        status: str,
+        rows: int = 0,
+        seconds: float = 0.0,
+        error: Optional[str] = None
+    ):
+        self.table = table
+        self.status = status  # "ok", "skipped" or "failed"
+        self.rows = rows
+        self.seconds = seconds
+        self.error = error
+
+    def __repr__(self) -> str:
+        return (
+            f"TableResult({self.table!r}, {self.status!r}, "
+            f"rows={self.rows}, seconds={self.seconds:.2f})"
+        )
+
+
+def create_pools(src_db: dict, tgt_db: dict, degree: int):
+    src_pool = oracledb.create_pool(min=1, max=degree, increment=1, **src_db)
+    tgt_pool = oracledb.create_pool(min=1, max=degree, increment=1, **tgt_db)
+    return src_pool, tgt_pool
+
+
+def order_by_size(tables: List[str], sizes: Dict[str, int]) -> List[str]:
+    """Largest tables first so the big ones don't finish last."""
+    return sorted(tables, key=lambda t: sizes.get(t, 0), reverse=True)
+
+
+def run_table(
+    worker: Callable,
+    src_conn,
+    tgt_conn,
+    table: str
+) -> TableResult:
+    start = time.perf_counter()
+    try:
+        rows = worker(src_conn, tgt_conn, table)
+        status, error = "ok", None
+    except SkipTable as e:
+        rows, status, error = 0, "skipped", str(e)
+    except Exception as e:
+        try:
+            tgt_conn.rollback()
+        except Exception:
+            pass
+        rows, status, error = 0, "failed", f"{e}\n{traceback.format_exc()}"
+    return TableResult(table, status, rows, time.perf_counter() - start, error)
+
+
+def report(result: TableResult) -> None:
+    if result.status == "ok":
+        print(
+            f"📥 Loaded {result.rows} rows into {result.table} "
+            f"({result.seconds:.1f}s)"
+        )
+    elif result.status == "skipped":
+        print(f"⚠️ Skipping table {result.table}: {result.error}")
+    else:
+        print(f"❌ Failed table {result.table}: {result.error.splitlines()[0]}")
+
+
+def run_parallel(
+    tables: List[str],
+    src_pool,
+    tgt_pool,
+    worker: Callable,
+    degree: int,
+    sizes: Optional[Dict[str, int]] = None
+) -> List[TableResult]:
+    ordered = order_by_size(tables, sizes or {})
+
+    def task(table: str) -> TableResult:
+        try:
+            src_conn = src_pool.acquire()
+        except Exception as e:
+            return TableResult(table, "failed", error=f"source pool: {e}")
+        try:
+            try:
+                tgt_conn = tgt_pool.acquire()
+            except Exception as e:
+                return TableResult(table, "failed", error=f"target pool: {e}")
+            try:
+                return run_table(worker, src_conn, tgt_conn, table)
+            finally:
+                tgt_pool.release(tgt_conn)
+        finally:
+            src_pool.release(src_conn)
+
+    results = []
+    with ThreadPoolExecutor(max_workers=degree) as executor:
+        futures = [executor.submit(task, t) for t in ordered]
+        for future in as_completed(futures):
+            result = future.result()
+            report(result)
+            results.append(result)
+    return results
+
+
+def print_summary(results: List[TableResult]) -> None:
+    ok = [r for r in results if r.status == "ok"]
+    skipped = [r for r in results if r.status == "skipped"]
+    failed = [r for r in results if r.status == "failed"]
+
+    print(
+        f"\n📊 {len(ok)} loaded, {len(skipped)} skipped, "
+        f"{len(failed)} failed, {sum(r.rows for r in ok)} rows total"
+    )
+    for r in failed:
+        print(f"   ❌ {r.table}: {r.error.splitlines()[0]}")
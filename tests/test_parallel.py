@@ -0,0 +1,104 @@
+import sqlite3
+from functools import partial
+
+import pytest
+
+import app1
+from bench import DICTIONARY, SQLitePool
+from metadata import Column, build_create_sql, load_schema
+from parallel import run_parallel
+
+OWNER = app1.SRC_SCHEMA
+
+COLUMNS = [
+    Column("ID", "NUMBER", 22, 10, 0, "N"),
+    Column("NAME", "VARCHAR2", 40, None, None, "Y", 40, "B"),
+]
+
+# table -> rows; sizes differ so the largest-first order is visible
+TABLES = {"SMALL": 10, "BIG": 1000, "MID": 200, "BROKEN": 50}
+
+
+def make_source(path: str) -> None:
+    conn = sqlite3.connect(path)
+    conn.executescript(DICTIONARY)
+    for table, rows in TABLES.items():
+        # BROKEN has a column in the dictionary that the table doesn't have,
+        # so its rows don't fit the target it creates
+        columns = COLUMNS + [Column("GONE", "NUMBER", 22, None, None, "Y")] \
+            if table == "BROKEN" else COLUMNS
+        conn.execute(build_create_sql(table, COLUMNS))
+        conn.executemany(
+            f"INSERT INTO {table} VALUES (?, ?)",
+            [(i, f"{table.lower()}-{i}") for i in range(1, rows + 1)]
+        )
+        conn.execute("INSERT INTO all_tables VALUES (?, ?, ?)", (OWNER, table, rows))
+        conn.executemany(
+            "INSERT INTO all_tab_columns VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(OWNER, table, c.name, i + 1, *c[1:]) for i, c in enumerate(columns)]
+        )
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def pools(tmp_path):
+    source, target = tmp_path / "src.db", tmp_path / "tgt.db"
+    make_source(str(source))
+    sqlite3.connect(str(target)).close()
+    return SQLitePool(str(source)), SQLitePool(str(target))
+
+
+def run(pools, degree: int):
+    src_pool, tgt_pool = pools
+    conn = src_pool.acquire()
+    schema = load_schema(conn.cursor(), OWNER)
+    src_pool.release(conn)
+    results = run_parallel(
+        schema.table_names(), src_pool, tgt_pool,
+        partial(app1.migrate_table, schema=schema), degree, schema.sizes()
+    )
+    return {r.table: r for r in results}, results
+
+
+def target_count(pools, table: str) -> int:
+    conn = pools[1].acquire()
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        pools[1].release(conn)
+
+
+def test_tables_start_largest_first(pools):
+    # one worker finishes tables in the order they were started
+    _, results = run(pools, degree=1)
+    assert [r.table for r in results] == ["BIG", "MID", "BROKEN", "SMALL"]
+
+
+def test_each_table_gets_its_own_rows(pools):
+    by_table, _ = run(pools, degree=3)
+    for table in ("SMALL", "MID", "BIG"):
+        assert by_table[table].status == "ok"
+        assert by_table[table].rows == TABLES[table]
+        assert target_count(pools, table) == TABLES[table]
+
+
+def test_failing_table_does_not_stop_the_others(pools):
+    by_table, results = run(pools, degree=3)
+    assert len(results) == len(TABLES)
+    assert by_table["BROKEN"].status == "failed"
+    assert by_table["BROKEN"].rows == 0
+    assert by_table["BROKEN"].error
+    assert [t for t, r in by_table.items() if r.status != "ok"] == ["BROKEN"]
+
+
+def test_existing_target_table_is_skipped(pools):
+    conn = pools[1].acquire()
+    conn.execute(build_create_sql("MID", COLUMNS))
+    conn.commit()
+    pools[1].release(conn)
+
+    by_table, _ = run(pools, degree=2)
+    assert by_table["MID"].status == "skipped"
+    assert "already exists" in by_table["MID"].error
+    assert by_table["BIG"].status == "ok"
@@ -0,0 +1,341 @@
+import json
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from metadata import Column, SchemaModel, TableMeta
+
+# ----------------------------
+# POST-MIGRATION VALIDATION
+# ----------------------------
+#
+# Every row gets a hash computed server-side: the sum of ORA_HASH over its
+# columns, seeded with the column position so swapped values still
+# differ. Rows are grouped into buckets by MOD(hash, buckets) and each
+# side returns only COUNT(*) and SUM(hash) per bucket, which doesn't
+# depend on row order or ROWIDs. The buckets that differ are then read
+# back row by row (hash + key) in one scan per side to name the rows that
+# don't match, unless the row counts are already too far apart for the
+# report to list them.
+#
+# LOBs are hashed whole with DBMS_CRYPTO when both sessions may execute it.
+# Without that grant only their length and leading piece are hashed, and
+# LONG, LONG RAW and BFILE columns can't be hashed in SQL at all; the
+# report lists such columns per table so a "match" says what it covers.
+
+MAX_BUCKET = 4294967295
+
+# Differing rows listed per table in the report
+MAX_DIFF_ROWS = 100
+
+# Rows read back per side while looking for the differing ones
+MAX_DRILL_ROWS = 100000
+
+LOB_TYPES = ("CLOB", "NCLOB", "BLOB")
+LONG_TYPES = ("LONG", "LONG RAW", "BFILE")
+
+
+# DBMS_CRYPTO.HASH_SH1; package constants can't be referenced from SQL
+HASH_SH1 = 3
+
+
+def column_hash(col: Column, position: int, full_lobs: bool = False) -> str:
+    name = f'"{col.name}"'
+    if col.data_type in LOB_TYPES and full_lobs:
+        value = f"ORA_HASH(DBMS_CRYPTO.HASH({name}, {HASH_SH1}), {MAX_BUCKET}, {position})"
+    elif col.data_type in LOB_TYPES:
+        # ORA_HASH can't take a LOB: hash its length and leading piece
+        piece = 2000 if col.data_type == "BLOB" else 1000
+        value = (
+            f"ORA_HASH(DBMS_LOB.GETLENGTH({name}), {MAX_BUCKET}, {position}) + "
+            f"ORA_HASH(DBMS_LOB.SUBSTR({name}, {piece}, 1), {MAX_BUCKET}, {position})"
+        )
+    elif col.data_type in LONG_TYPES:
+        return ""
+    else:
+        value = f"ORA_HASH({name}, {MAX_BUCKET}, {position})"
+    return f"NVL({value}, {position})"
+
+
+def row_hash(columns: List[Column], full_lobs: bool = False) -> str:
+    parts = [column_hash(col, i + 1, full_lobs) for i, col in enumerate(columns)]
+    return " + ".join(p for p in parts if p) or "0"
+
+
+def can_hash_lobs(conn) -> bool:
+    """Whether the session may run DBMS_CRYPTO, which isn't granted by default."""
+    cur = conn.cursor()
+    try:
+        cur.execute(f"SELECT DBMS_CRYPTO.HASH(UTL_RAW.CAST_TO_RAW('x'), {HASH_SH1}) FROM dual")
+        cur.fetchall()
+        return True
+    except Exception:
+        return False
+    finally:
+        cur.close()
+
+
+def bucket_sums(
+    cur,
+    source: str,
+    columns: List[Column],
+    buckets: int,
+    full_lobs: bool = False
+) -> Dict[int, tuple]:
+    """{bucket: (rows, sum of row hashes)} for one side."""
+    # the bucket count is inlined: two binds of the same name are still two
+    # binds to Oracle, so MOD(h, :b) in SELECT wouldn't match GROUP BY (ORA-00979)
+    cur.execute(f"""
+        SELECT b, COUNT(*), TO_CHAR(SUM(h))
+        FROM (
+            SELECT MOD(h, {int(buckets)}) AS b, h
+            FROM (SELECT {row_hash(columns, full_lobs)} AS h FROM {source})
+        )
+        GROUP BY b
+    """)
+    return {int(b): (n, s) for b, n, s in cur.fetchall()}
+
+
+def bucket_rows(
+    cur,
+    source: str,
+    columns: List[Column],
+    buckets: int,
+    wanted: List[int],
+    key: List[str],
+    limit: int,
+    full_lobs: bool = False
+) -> Tuple[Counter, Optional[int]]:
+    """Row hashes (with their key values) inside the wanted buckets, in one scan.
+
+    Rows come back in hash order and at most `limit` are fetched. Returns
+    the rows plus, when the limit cut the list short, the last hash read.
+    """
+    key_cols = ", ".join(f'"{k}"' for k in key) if key else "NULL"
+    in_list = ", ".join(str(int(b)) for b in wanted)
+    cur.execute(f"""
+        SELECT h, {key_cols}
+        FROM (SELECT {row_hash(columns, full_lobs)} AS h, t.* FROM {source} t)
+        WHERE MOD(h, {int(buckets)}) IN ({in_list})
+        ORDER BY 1
+    """)
+    rows = []
+    while len(rows) < limit:
+        fetched = cur.fetchmany(min(cur.arraysize, limit - len(rows)))
+        if not fetched:
+            return Counter((int(r[0]), tuple(r[1:]) if key else ()) for r in rows), None
+        rows.extend(fetched)
+    last = int(rows[-1][0])
+    return Counter((int(r[0]), tuple(r[1:]) if key else ()) for r in rows), last
+
+
+class TableCheck:
+    def __init__(self, table: str):
+        self.table = table
+        self.status = "match"
+        self.source_rows = 0
+        self.target_rows = 0
+        self.mismatched_buckets: List[int] = []
+        self.differences: List[dict] = []
+        self.seconds = 0.0
+        self.partial_columns: List[str] = []
+        self.unchecked_columns: List[str] = []
+        self.note: Optional[str] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "table": self.table,
+            "status": self.status,
+            "source_rows": self.source_rows,
+            "target_rows": self.target_rows,
+            "mismatched_buckets": self.mismatched_buckets,
+            "differences": self.differences,
+            "partial_columns": self.partial_columns,
+            "unchecked_columns": self.unchecked_columns,
+            "seconds": round(self.seconds, 3),
+            "note": self.note,
+            "error": self.error,
+        }
+
+
+def differing_rows(
+    src_conn,
+    tgt_conn,
+    meta: TableMeta,
+    source: str,
+    target: str,
+    buckets: int,
+    wanted: List[int],
+    key: List[str],
+    full_lobs: bool = False
+) -> List[dict]:
+    """Rows of the wanted buckets found on one side only, up to MAX_DIFF_ROWS."""
+
+    def read(conn, name):
+        cur = conn.cursor()
+        try:
+            return bucket_rows(
+                cur, name, meta.columns, buckets, wanted, key, MAX_DRILL_ROWS, full_lobs
+            )
+        finally:
+            cur.close()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        src_future = executor.submit(read, src_conn, source)
+        tgt_future = executor.submit(read, tgt_conn, target)
+        (src_rows, src_last), (tgt_rows, tgt_last) = src_future.result(), tgt_future.result()
+
+    # a side cut short has only seen hashes up to its last one; compare
+    # below that so rows the other side simply didn't read don't show up
+    cutoffs = [h for h in (src_last, tgt_last) if h is not None]
+    if cutoffs:
+        cutoff = min(cutoffs)
+        src_rows = Counter({r: n for r, n in src_rows.items() if r[0] < cutoff})
+        tgt_rows = Counter({r: n for r, n in tgt_rows.items() if r[0] < cutoff})
+
+    differences = []
+    for side, diff in (
+        ("missing_in_target", src_rows - tgt_rows),
+        ("extra_in_target", tgt_rows - src_rows),
+    ):
+        for (h, values), count in sorted(diff.items(), key=lambda kv: kv[0][0]):
+            if len(differences) >= MAX_DIFF_ROWS:
+                break
+            differences.append({
+                "side": side,
+                "bucket": h % buckets,
+                "row_hash": h,
+                "key": dict(zip(key, values)),
+                "count": count,
+            })
+    return differences
+
+
+def validate_table(
+    src_conn,
+    tgt_conn,
+    meta: TableMeta,
+    source: str,
+    target: str,
+    buckets: int
+) -> TableCheck:
+    check = TableCheck(meta.name)
+    start = time.perf_counter()
+
+    # both sides must hash LOBs the same way for the sums to compare
+    lobs = [c.name for c in meta.columns if c.data_type in LOB_TYPES]
+    full_lobs = bool(lobs) and can_hash_lobs(src_conn) and can_hash_lobs(tgt_conn)
+    check.partial_columns = [] if full_lobs else lobs
+    check.unchecked_columns = [c.name for c in meta.columns if c.data_type in LONG_TYPES]
+
+    def sums(conn, name):
+        cur = conn.cursor()
+        try:
+            return bucket_sums(cur, name, meta.columns, buckets, full_lobs)
+        finally:
+            cur.close()
+
+    # ---- Both sides aggregate at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        src_future = executor.submit(sums, src_conn, source)
+        tgt_future = executor.submit(sums, tgt_conn, target)
+        src_sums, tgt_sums = src_future.result(), tgt_future.result()
+
+    check.source_rows = sum(n for n, _ in src_sums.values())
+    check.target_rows = sum(n for n, _ in tgt_sums.values())
+    check.mismatched_buckets = sorted(
+        b for b in set(src_sums) | set(tgt_sums)
+        if src_sums.get(b) != tgt_sums.get(b)
+    )
+
+    if check.mismatched_buckets:
+        check.status = "mismatch"
+        # without a primary key the row's own (non-LOB) values identify it
+        key = meta.primary_key or [
+            c.name for c in meta.columns
+            if c.data_type not in LOB_TYPES + LONG_TYPES
+        ]
+        if abs(check.source_rows - check.target_rows) > MAX_DIFF_ROWS:
+            check.note = "row counts too far apart to list differing rows"
+        else:
+            check.differences = differing_rows(
+                src_conn, tgt_conn, meta, source, target, buckets,
+                check.mismatched_buckets, key, full_lobs
+            )
+
+    check.seconds = time.perf_counter() - start
+    return check
+
+
+def validate_tables(
+    tables: List[str],
+    schema: SchemaModel,
+    src_pool,
+    tgt_pool,
+    degree: int,
+    buckets: int,
+    source_prefix: str = ""
+) -> List[TableCheck]:
+    """Validate tables in parallel; each task takes one source and one target connection."""
+
+    def task(table: str) -> TableCheck:
+        try:
+            src_conn = src_pool.acquire()
+            try:
+                tgt_conn = tgt_pool.acquire()
+                try:
+                    return validate_table(
+                        src_conn, tgt_conn, schema.table(table),
+                        f"{source_prefix}{table}", table, buckets
+                    )
+                finally:
+                    tgt_pool.release(tgt_conn)
+            finally:
+                src_pool.release(src_conn)
+        except Exception as e:
+            check = TableCheck(table)
+            check.status = "error"
+            check.error = f"{e}\n{traceback.format_exc()}"
+            return check
+
+    checks = []
+    with ThreadPoolExecutor(max_workers=degree) as executor:
+        futures = [executor.submit(task, t) for t in tables]
+        for future in as_completed(futures):
+            check = future.result()
+            if check.status == "match":
+                print(f"✔️ {check.table}: {check.source_rows} rows match ({check.seconds:.1f}s)")
+                if check.partial_columns:
+                    partial = ", ".join(check.partial_columns)
+                    print(f"   ⚠️ only length and leading piece compared: {partial}")
+                if check.unchecked_columns:
+                    print(f"   ⚠️ not compared: {', '.join(check.unchecked_columns)}")
+            elif check.status == "mismatch":
+                print(
+                    f"❗ {check.table}: source {check.source_rows} / target "
+                    f"{check.target_rows} rows, {len(check.mismatched_buckets)} "
+                    f"buckets differ"
+                )
+            else:
+                print(f"❌ {check.table}: validation failed: {check.error.splitlines()[0]}")
+            checks.append(check)
+    return checks
+
+
+def write_report(path: str, checks: List[TableCheck], buckets: int) -> None:
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "buckets": buckets,
+        "summary": {
+            status: sum(1 for c in checks if c.status == status)
+            for status in ("match", "mismatch", "error")
+        },
+        "tables": [c.to_dict() for c in sorted(checks, key=lambda c: c.table)],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\n🧾 Validation report written to {path}")